@@ -0,0 +1,151 @@
+import asyncio
+import json
+import math
+import time
+from os import getenv
+from typing import Dict, Optional
+
+# Concurrent requests and queued requests allowed per route class in each worker,
+# e.g. "reads=32:128,writes=16:64"; unspecified classes keep their defaults
+DEFAULT_LIMITS = {"auth": (8, 32), "writes": (16, 64), "reads": (32, 128), "exports": (2, 4)}
+# Seconds a request may wait for a slot before it is shed
+ADMISSION_QUEUE_TIMEOUT = float(getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_ENABLED = getenv("ADMISSION_CONTROL", "true").lower() == "true"
+
+# Never queued or shed, so monitoring keeps working under load
+EXEMPT_PATHS = {"/", "/api/health", "/docs", "/redoc", "/openapi.json"}
+# Streams would hold a slot for as long as they stay open; they have their own subscriber cap
+STREAMING_PATHS = {"/api/dashboard/stream"}
+
+def parse_limits(value: Optional[str]) -> Dict[str, tuple]:
+    limits = dict(DEFAULT_LIMITS)
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, spec = item.split("=", 1)
+            concurrent, _, queue = spec.partition(":")
+            limits[name.strip()] = (int(concurrent), int(queue or 0))
+    return limits
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Maps a request to its route class, or None when it bypasses admission control."""
+    if path in EXEMPT_PATHS or path in STREAMING_PATHS or not path.startswith("/api/"):
+        return None
+    if path.startswith(("/api/token", "/api/users")):
+        return "auth"
+    if path.endswith(("/import", "/export")) or path.startswith("/api/reports/"):
+        return "exports"
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "reads"
+    return "writes"
+
+class RouteClass:
+    """A bounded pool of request slots with a bounded queue in front of it."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, shed_status: int = 503):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.shed_status = shed_status
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+        self.last_shed = 0.0
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.active >= self.max_concurrent or self.waiting:
+            if self.waiting >= self.max_queue:
+                self.shed_queue_full += 1
+                self.last_shed = time.monotonic()
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                self.shed_timeout += 1
+                self.last_shed = time.monotonic()
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self.semaphore.acquire()
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_queue_full,
+            "shed_timeout": self.shed_timeout,
+        }
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, tuple], queue_timeout: float):
+        self.queue_timeout = queue_timeout
+        self.classes = {
+            # Login and registration bursts are client driven, so clients are told to back off
+            name: RouteClass(name, concurrent, queue, shed_status=429 if name == "auth" else 503)
+            for name, (concurrent, queue) in limits.items()
+        }
+
+    def shedding(self, within: float = 10.0) -> bool:
+        now = time.monotonic()
+        return any(now - route_class.last_shed < within for route_class in self.classes.values() if route_class.last_shed)
+
+    def stats(self) -> dict:
+        return {name: route_class.stats() for name, route_class in self.classes.items()}
+
+admission = AdmissionController(parse_limits(getenv("ADMISSION_LIMITS")), ADMISSION_QUEUE_TIMEOUT)
+
+class AdmissionMiddleware:
+    """Caps concurrent requests per route class and sheds load once the queue is full or too slow."""
+
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        name = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        route_class = self.controller.classes.get(name)
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await route_class.acquire(self.controller.queue_timeout):
+            await self.shed(route_class, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release()
+
+    async def shed(self, route_class: RouteClass, send):
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": route_class.shed_status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(self.controller.queue_timeout))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
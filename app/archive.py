@@ -0,0 +1,226 @@
+from datetime import datetime, timedelta
+from os import getenv
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import and_, delete, exists, insert, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+from . import models, schemas
+from .bulk import execute_in_chunks, existing_ids
+from .database import SessionLocal
+from .jobs import runner
+
+# Inactive students untouched for this long are moved to archived_students
+ARCHIVE_INACTIVE_STUDENT_DAYS = int(getenv("ARCHIVE_INACTIVE_STUDENT_DAYS", "365"))
+# Enrollments of courses that ended this long ago are moved to archived_enrollments
+ARCHIVE_FINISHED_COURSE_DAYS = int(getenv("ARCHIVE_FINISHED_COURSE_DAYS", "365"))
+
+STUDENT_COLUMNS = [column.name for column in models.Student.__table__.columns]
+ENROLLMENT_COLUMNS = [column.name for column in models.CourseEnrollment.__table__.columns]
+
+def _copy(source, names: List[str], **overrides):
+    """SELECT of `names` from `source` for INSERT ... SELECT, with some columns replaced."""
+    return select(*[overrides[name].label(name) if name in overrides else source.__table__.c[name] for name in names])
+
+def _cutoffs():
+    now = datetime.utcnow()
+    return now - timedelta(days=ARCHIVE_INACTIVE_STUDENT_DAYS), now - timedelta(days=ARCHIVE_FINISHED_COURSE_DAYS)
+
+def student_policy():
+    """Inactive students untouched since the cutoff and without enrollments in recent courses."""
+    student_cutoff, course_cutoff = _cutoffs()
+    recent_course = exists().where(
+        models.CourseEnrollment.student_id == models.Student.id,
+        models.CourseEnrollment.course_id == models.Course.id,
+        or_(models.Course.end_date.is_(None), models.Course.end_date >= course_cutoff),
+    )
+    return and_(
+        models.Student.active.is_(False),
+        or_(models.Student.updated_at.is_(None), models.Student.updated_at < student_cutoff),
+        ~recent_course,
+    )
+
+def enrollment_policy():
+    _, course_cutoff = _cutoffs()
+    finished = select(models.Course.id).where(models.Course.end_date < course_cutoff)
+    return models.CourseEnrollment.course_id.in_(finished)
+
+def archive_statements(archived_at: datetime) -> Dict[str, Dict[str, Callable]]:
+    """Per-chunk statements moving rows to the archive tables.
+
+    The policy is checked again inside each chunk, so rows that changed since they
+    were selected (e.g. a reactivated student) stay in the hot tables. Removal goes
+    by the ids now in the archive tables, so it deletes exactly what was copied.
+    """
+    return {
+        "students": {
+            "enrollments_archived": lambda chunk: insert(models.ArchivedEnrollment).from_select(
+                ENROLLMENT_COLUMNS + ["archived_at"],
+                _copy(models.CourseEnrollment, ENROLLMENT_COLUMNS + ["archived_at"], archived_at=literal(archived_at))
+                .where(models.CourseEnrollment.student_id.in_(
+                    select(models.Student.id).where(models.Student.id.in_(chunk), student_policy())
+                ))
+            ),
+            "enrollments_removed": lambda chunk: delete(models.CourseEnrollment).where(
+                models.CourseEnrollment.id.in_(select(models.ArchivedEnrollment.id).where(
+                    models.ArchivedEnrollment.student_id.in_(chunk)
+                ))
+            ),
+            # Archived students give up their waitlist places
+            "waitlist_entries_removed": lambda chunk: delete(models.WaitlistEntry).where(
+                models.WaitlistEntry.student_id.in_(
+                    select(models.Student.id).where(models.Student.id.in_(chunk), student_policy())
+                )
+            ),
+            "archived": lambda chunk: insert(models.ArchivedStudent).from_select(
+                STUDENT_COLUMNS + ["archived_at"],
+                _copy(models.Student, STUDENT_COLUMNS + ["archived_at"], archived_at=literal(archived_at))
+                .where(models.Student.id.in_(chunk), student_policy())
+            ),
+            "removed": lambda chunk: delete(models.Student).where(
+                models.Student.id.in_(select(models.ArchivedStudent.id).where(
+                    models.ArchivedStudent.id.in_(chunk)
+                ))
+            ),
+        },
+        "enrollments": {
+            "archived": lambda chunk: insert(models.ArchivedEnrollment).from_select(
+                ENROLLMENT_COLUMNS + ["archived_at"],
+                _copy(models.CourseEnrollment, ENROLLMENT_COLUMNS + ["archived_at"], archived_at=literal(archived_at))
+                .where(models.CourseEnrollment.id.in_(chunk), enrollment_policy())
+            ),
+            "removed": lambda chunk: delete(models.CourseEnrollment).where(
+                models.CourseEnrollment.id.in_(select(models.ArchivedEnrollment.id).where(
+                    models.ArchivedEnrollment.id.in_(chunk)
+                ))
+            ),
+        },
+    }
+
+def run_archive(db: Session, chunk_size: Optional[int] = None, on_chunk: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Moves every row matching the policies to the archive tables, one short transaction per chunk.
+
+    Archived paid enrollments keep counting towards revenue (see revenue.paid_counts),
+    so the rollups are unaffected.
+    """
+    archived_at = datetime.utcnow()
+    statements = archive_statements(archived_at)
+    student_ids = [student_id for (student_id,) in db.query(models.Student.id).filter(student_policy())]
+    enrollment_ids = [enrollment_id for (enrollment_id,) in db.query(models.CourseEnrollment.id).filter(enrollment_policy())]
+    total = len(student_ids) + len(enrollment_ids)
+    progress = (lambda processed, _: on_chunk(processed, total)) if on_chunk else None
+    students = execute_in_chunks(db, student_ids, statements["students"], chunk_size, on_chunk=progress)
+    offset = len(student_ids)
+    progress = (lambda processed, _: on_chunk(offset + processed, total)) if on_chunk else None
+    enrollments = execute_in_chunks(db, enrollment_ids, statements["enrollments"], chunk_size, on_chunk=progress)
+    return {
+        "students_archived": students["archived"],
+        "enrollments_archived": students["enrollments_archived"] + enrollments["archived"],
+    }
+
+@runner.register("archive.run", max_concurrency=1, params=schemas.ChunkedJobParams)
+def run_archive_job(ctx, params):
+    with SessionLocal() as db:
+        return run_archive(db, params.get("chunk_size"), on_chunk=ctx.progress)
+
+def restore_students(db: Session, student_ids: List[int], chunk_size: Optional[int] = None) -> dict:
+    """Moves archived students back with the archived enrollments whose course still exists.
+
+    Students whose email has since been taken by another student, or whose id has been
+    handed out again, are left archived; so are enrollments whose id has been reused.
+    The tombstones left by archiving are removed, so delta sync clients see the
+    restored rows as changed and not also as deleted.
+    """
+    archived = dict(db.query(models.ArchivedStudent.id, models.ArchivedStudent.email)
+                    .filter(models.ArchivedStudent.id.in_(student_ids)))
+    taken = {email for (email,) in db.query(models.Student.email).filter(models.Student.email.in_(set(archived.values())))}
+    reused = set(existing_ids(db, models.Student, list(archived)))
+    restorable = [student_id for student_id, email in archived.items() if email not in taken and student_id not in reused]
+    enrollment_conflicts = [enrollment_id for (enrollment_id,) in db.query(models.ArchivedEnrollment.id).filter(
+        models.ArchivedEnrollment.student_id.in_(restorable),
+        models.ArchivedEnrollment.id.in_(select(models.CourseEnrollment.id)),
+    )]
+    # Archived enrollments of the chunk now back in the hot table
+    restored_enrollments = lambda chunk: select(models.ArchivedEnrollment.id).where(
+        models.ArchivedEnrollment.student_id.in_(chunk),
+        models.ArchivedEnrollment.id.in_(select(models.CourseEnrollment.id)),
+        models.ArchivedEnrollment.id.notin_(enrollment_conflicts),
+    )
+    now = datetime.utcnow()
+    totals = execute_in_chunks(db, restorable, {
+        "restored": lambda chunk: insert(models.Student).from_select(
+            STUDENT_COLUMNS,
+            # Fresh updated_at so delta sync clients see the row again
+            _copy(models.ArchivedStudent, STUDENT_COLUMNS, updated_at=literal(now))
+            .where(models.ArchivedStudent.id.in_(chunk))
+        ),
+        "enrollments_restored": lambda chunk: insert(models.CourseEnrollment).from_select(
+            ENROLLMENT_COLUMNS,
+            _copy(models.ArchivedEnrollment, ENROLLMENT_COLUMNS, updated_at=literal(now))
+            .where(models.ArchivedEnrollment.student_id.in_(chunk),
+                   models.ArchivedEnrollment.course_id.in_(select(models.Course.id)),
+                   models.ArchivedEnrollment.id.notin_(enrollment_conflicts))
+        ),
+        "tombstones_removed": lambda chunk: delete(models.DeletedRow).where(or_(
+            and_(models.DeletedRow.table_name == "students", models.DeletedRow.row_id.in_(chunk)),
+            and_(models.DeletedRow.table_name == "course_enrollments", models.DeletedRow.row_id.in_(restored_enrollments(chunk))),
+        )),
+        # Filtered directly: MySQL cannot delete from a table its own subquery reads
+        "archived_enrollments_removed": lambda chunk: delete(models.ArchivedEnrollment).where(
+            models.ArchivedEnrollment.student_id.in_(chunk),
+            models.ArchivedEnrollment.id.in_(select(models.CourseEnrollment.id)),
+            models.ArchivedEnrollment.id.notin_(enrollment_conflicts),
+        ),
+        "archived_removed": lambda chunk: delete(models.ArchivedStudent).where(models.ArchivedStudent.id.in_(chunk)),
+    }, chunk_size)
+    return {
+        "restored": totals["restored"],
+        "enrollments_restored": totals["enrollments_restored"],
+        "email_conflicts": sorted(set(archived) - set(restorable) - reused),
+        "id_conflicts": sorted(reused),
+        "enrollment_id_conflicts": sorted(enrollment_conflicts),
+        "not_found": sorted(set(student_ids) - set(archived)),
+    }
+
+def restore_enrollments(db: Session, enrollment_ids: List[int], chunk_size: Optional[int] = None) -> dict:
+    """Moves archived enrollments back when both their student and course are in the hot tables.
+
+    Enrollments whose id has since been handed out again are left archived.
+    """
+    reused = existing_ids(db, models.CourseEnrollment, enrollment_ids)
+    restored = lambda chunk: select(models.ArchivedEnrollment.id).where(
+        models.ArchivedEnrollment.id.in_(chunk),
+        models.ArchivedEnrollment.id.notin_(reused),
+        models.ArchivedEnrollment.id.in_(select(models.CourseEnrollment.id)),
+    )
+    now = datetime.utcnow()
+    totals = execute_in_chunks(db, enrollment_ids, {
+        "restored": lambda chunk: insert(models.CourseEnrollment).from_select(
+            ENROLLMENT_COLUMNS,
+            _copy(models.ArchivedEnrollment, ENROLLMENT_COLUMNS, updated_at=literal(now))
+            .where(models.ArchivedEnrollment.id.in_(chunk),
+                   models.ArchivedEnrollment.id.notin_(reused),
+                   models.ArchivedEnrollment.student_id.in_(select(models.Student.id)),
+                   models.ArchivedEnrollment.course_id.in_(select(models.Course.id)))
+        ),
+        "tombstones_removed": lambda chunk: delete(models.DeletedRow).where(
+            models.DeletedRow.table_name == "course_enrollments", models.DeletedRow.row_id.in_(restored(chunk))
+        ),
+        "archived_removed": lambda chunk: delete(models.ArchivedEnrollment).where(
+            models.ArchivedEnrollment.id.in_(chunk),
+            models.ArchivedEnrollment.id.notin_(reused),
+            models.ArchivedEnrollment.id.in_(select(models.CourseEnrollment.id)),
+        ),
+    }, chunk_size)
+    return {
+        "restored": totals["restored"],
+        "not_restored": len(set(enrollment_ids)) - totals["restored"],
+        "id_conflicts": reused,
+    }
+
+def with_archived(db: Session, model, archived_model, skip: int, limit: int) -> List[dict]:
+    """One page over hot and archived rows together, ordered by id; archived rows are flagged."""
+    names = [column.name for column in model.__table__.columns]
+    rows = union_all(
+        select(*[model.__table__.c[name] for name in names], literal(False).label("archived")),
+        select(*[archived_model.__table__.c[name] for name in names], literal(True).label("archived")),
+    ).subquery()
+    return [dict(row) for row in db.execute(select(rows).order_by(rows.c.id).offset(skip).limit(limit)).mappings()]
@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from os import getenv
+from typing import Callable, Iterable, List, NamedTuple, Optional
+from fastapi import Request
+from sqlalchemy import insert
+from .database import SessionLocal
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Events waiting to be written; once full, new events are dropped and counted
+AUDIT_QUEUE_SIZE = int(getenv("AUDIT_QUEUE_SIZE", "50000"))
+# A batch is written once it holds this many events...
+AUDIT_BATCH_SIZE = int(getenv("AUDIT_BATCH_SIZE", "500"))
+# ...or once its first event has waited this long
+AUDIT_FLUSH_SECONDS = float(getenv("AUDIT_FLUSH_SECONDS", "1"))
+
+class AuditContext(NamedTuple):
+    actor: Optional[str]  # Email from the bearer token, if one was sent
+    client: Optional[str]
+
+# Dependency for audited routes
+def audit_context(request: Request) -> AuditContext:
+    actor = None
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        from jose import JWTError, jwt
+        from .auth import SECRET_KEY, ALGORITHM
+        try:
+            actor = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        except JWTError:
+            pass
+    return AuditContext(actor, request.client.host if request.client else None)
+
+class AuditLog:
+    """Write-behind audit trail: handlers enqueue events and a background thread
+    inserts them in batches, so auditing adds no statement to the request."""
+
+    def __init__(self, queue_size: int = AUDIT_QUEUE_SIZE, batch_size: int = AUDIT_BATCH_SIZE, flush_seconds: float = AUDIT_FLUSH_SECONDS):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue: "queue.Queue[dict]" = queue.Queue(queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, context: AuditContext, action: str, entity: str, entity_ids: Iterable[int]):
+        """Queues one event per entity; call after the change has been committed."""
+        now = datetime.utcnow()
+        for entity_id in entity_ids:
+            try:
+                self.queue.put_nowait({
+                    "occurred_at": now,
+                    "actor": context.actor,
+                    "client": context.client,
+                    "action": action,
+                    "entity": entity,
+                    "entity_id": entity_id,
+                })
+            except queue.Full:
+                self.dropped += 1
+
+    def chunk_recorder(self, context: AuditContext, action: str, entity: str, existing_ids: Iterable[int]) -> Callable[[List[int]], None]:
+        """An `on_commit` callback for execute_in_chunks recording each committed chunk's
+        ids among `existing_ids`, so chunks committed before a failure or cancellation
+        are audited too."""
+        existing = set(existing_ids)
+        return lambda chunk: self.record(context, action, entity, [entity_id for entity_id in chunk if entity_id in existing])
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def shutdown(self, timeout: float = 10.0):
+        """Stops the writer after it has flushed everything queued so far."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _next_batch(self) -> List[dict]:
+        try:
+            batch = [self.queue.get(timeout=self.flush_seconds)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._stop.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                if remaining <= 0:
+                    break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[dict]):
+        try:
+            with SessionLocal() as db:
+                db.execute(insert(models.AuditEvent), batch)
+                db.commit()
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+            logger.exception("Writing %d audit events failed", len(batch))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+audit_log = AuditLog()
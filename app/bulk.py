@@ -0,0 +1,54 @@
+from typing import Callable, Dict, Iterator, List, Optional
+from os import getenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+# Upper bound on ids handled per transaction by the bulk-* endpoints
+BULK_CHUNK_SIZE = int(getenv("BULK_CHUNK_SIZE", "500"))
+
+def chunked(ids: List[int], size: int) -> Iterator[List[int]]:
+    """Yields the distinct ids in order, at most `size` at a time."""
+    unique_ids = list(dict.fromkeys(ids))
+    for start in range(0, len(unique_ids), size):
+        yield unique_ids[start:start + size]
+
+def existing_ids(db: Session, model, ids: List[int], chunk_size: Optional[int] = None) -> List[int]:
+    """The distinct ids among `ids` that have a row in `model`'s table, in order."""
+    found = set()
+    for chunk in chunked(ids, chunk_size or BULK_CHUNK_SIZE):
+        found.update(db.execute(select(model.id).where(model.id.in_(chunk))).scalars())
+    return [entity_id for entity_id in dict.fromkeys(ids) if entity_id in found]
+
+def execute_in_chunks(
+    db: Session,
+    ids: List[int],
+    statements: Dict[str, Callable],
+    chunk_size: Optional[int] = None,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+    on_commit: Optional[Callable[[List[int]], None]] = None,
+) -> Dict[str, int]:
+    """Runs every statement against each chunk of ids in its own short transaction.
+
+    `statements` maps a result key to a factory building the statement for one chunk;
+    they run in insertion order, so dependent rows should come first. After each
+    commit, `on_commit` is called with the chunk's ids and then `on_chunk` with (ids
+    processed, total ids), which may raise to stop. Returns the summed rowcount per key.
+    """
+    totals = {key: 0 for key in statements}
+    unique_count = len(set(ids))
+    processed = 0
+    for chunk in chunked(ids, chunk_size or BULK_CHUNK_SIZE):
+        try:
+            for key, build in statements.items():
+                statement = build(chunk).execution_options(synchronize_session=False)
+                totals[key] += db.execute(statement).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if on_commit:
+            on_commit(chunk)
+        processed += len(chunk)
+        if on_chunk:
+            on_chunk(processed, unique_count)
+    return totals
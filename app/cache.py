@@ -0,0 +1,170 @@
+import threading
+from collections import OrderedDict
+from os import getenv
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from . import models
+
+# Upper bound on the serialized responses kept per worker; least recently used go first
+RESPONSE_CACHE_MAX_BYTES = int(getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESPONSE_CACHE_ENABLED = getenv("RESPONSE_CACHE", "true").lower() == "true"
+
+# Tables whose writes bump their row in table_versions
+VERSIONED_TABLES = {"students", "teachers", "courses", "course_enrollments"}
+
+_WRITTEN = "versioned_tables_written"
+_COMMITTING = "versioned_tables_committing"
+
+# Called with the set of versioned tables written, after each commit that wrote any;
+# may run on any thread that commits, so listeners must be cheap and thread-safe
+commit_listeners: List[Callable[[Set[str]], None]] = []
+
+def _record(session: Session, table_names: Iterable[str]):
+    written = session.info.setdefault(_WRITTEN, set())
+    written.update(name for name in table_names if name in VERSIONED_TABLES)
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session, flush_context):
+    # Still the pre-flush view, so this lists everything just written
+    _record(session, (obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)))
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_statement(orm_execute_state):
+    # Bulk insert/update/delete statements bypass the unit of work
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            _record(orm_execute_state.session, [table.name])
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    """Bumps the versions of written tables inside the committing transaction,
+    so every worker sees the new version exactly when it sees the new rows."""
+    # Objects still pending are flushed after this hook runs
+    _record(session, (obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)))
+    written = sorted(session.info.pop(_WRITTEN, ()))
+    if not written:
+        return
+    session.info[_COMMITTING] = set(written)
+    versions = models.TableVersion.__table__
+    result = session.execute(
+        update(versions)
+        .where(versions.c.table_name.in_(written))
+        .values(version=versions.c.version + 1)
+    )
+    if result.rowcount != len(written):
+        existing = set(session.execute(select(versions.c.table_name).where(versions.c.table_name.in_(written))).scalars())
+        session.execute(insert(versions), [{"table_name": name, "version": 1} for name in written if name not in existing])
+
+@event.listens_for(Session, "after_commit")
+def _notify_commit(session):
+    written = session.info.pop(_COMMITTING, None)
+    if written:
+        for listener in commit_listeners:
+            listener(written)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session):
+    session.info.pop(_WRITTEN, None)
+    session.info.pop(_COMMITTING, None)
+
+def table_versions(db: Session, tables: Iterable[str]) -> Tuple[int, ...]:
+    """Reads the current versions through the route's own session, so they match the data it reads."""
+    tables = sorted(tables)
+    versions = dict(db.execute(
+        select(models.TableVersion.table_name, models.TableVersion.version)
+        .where(models.TableVersion.table_name.in_(tables))
+    ).all())
+    return tuple(versions.get(name, 0) for name in tables)
+
+class ResponseCache:
+    """LRU of serialized response bodies, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+def _adapter(response_type) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+def cached_response(
+    request: Request,
+    db: Session,
+    tables: Iterable[str],
+    response_type,
+    build: Callable[[], Any],
+    exclude_unset: bool = False,
+    vary: tuple = (),
+) -> Response:
+    """Serves a GET route's body from the cache, or builds, serializes and stores it.
+
+    The key is the path, the sorted query parameters, `vary` and the versions of
+    `tables`; any committed write to one of them changes the key, so entries are
+    never invalidated explicitly and stale ones simply age out of the LRU.
+    """
+    key = None
+    if RESPONSE_CACHE_ENABLED:
+        key = (request.url.path, tuple(sorted(request.query_params.multi_items())), vary, tuple(sorted(tables)), table_versions(db, tables))
+        body = response_cache.get(key)
+        if body is not None:
+            return Response(body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(build(), from_attributes=True), exclude_unset=exclude_unset)
+    if key is not None:
+        response_cache.put(key, body)
+    return Response(body, media_type="application/json", headers={"X-Cache": "MISS"})
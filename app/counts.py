@@ -0,0 +1,73 @@
+import threading
+import time
+from os import getenv
+from typing import Any, Dict, Hashable, Optional, Tuple
+from sqlalchemy import func, text
+from sqlalchemy.orm import Query, Session
+from .cache import VERSIONED_TABLES, table_versions
+
+# Filtered counts, and counts of tables without a version counter, are reused this long
+COUNT_TTL_SECONDS = float(getenv("COUNT_TTL_SECONDS", "10"))
+# With ?exact=false, tables estimated above this many rows report the estimate instead
+COUNT_ESTIMATE_MIN_ROWS = int(getenv("COUNT_ESTIMATE_MIN_ROWS", "100000"))
+ESTIMATE_TTL_SECONDS = 60
+MAX_CACHED_COUNTS = 1000
+
+_counts: Dict[Hashable, Tuple[int, Any]] = {}
+_lock = threading.Lock()
+
+def _store(key: Hashable, value: int, valid: Any):
+    with _lock:
+        if len(_counts) >= MAX_CACHED_COUNTS:
+            _counts.clear()
+        _counts[key] = (value, valid)
+
+def clear():
+    with _lock:
+        _counts.clear()
+
+def filtered_count(key: Hashable, query: Query, ttl: float = COUNT_TTL_SECONDS) -> int:
+    """COUNT(*) of `query`, shared by every request with the same `key` for `ttl` seconds."""
+    cached = _counts.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    value = query.order_by(None).count()
+    _store(key, value, time.monotonic() + ttl)
+    return value
+
+def estimated_rows(db: Session, table: str) -> Optional[int]:
+    """The row estimate MySQL keeps for `table`, or None on other databases."""
+    if db.get_bind().dialect.name != "mysql":
+        return None
+    key = ("estimate", table)
+    cached = _counts.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    value = db.execute(
+        text("SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"),
+        {"table": table}
+    ).scalar()
+    if value is not None:
+        _store(key, int(value), time.monotonic() + ESTIMATE_TTL_SECONDS)
+    return value
+
+def table_count(db: Session, model, exact: bool = True) -> int:
+    """Row count of a whole table without running COUNT(*) on every request.
+
+    Versioned tables reuse the last count until a write bumps their version, so the
+    result stays exact; `exact=False` trades accuracy for an estimate on large tables.
+    """
+    table = model.__tablename__
+    if not exact:
+        estimate = estimated_rows(db, table)
+        if estimate is not None and estimate >= COUNT_ESTIMATE_MIN_ROWS:
+            return estimate
+    if table not in VERSIONED_TABLES:
+        return filtered_count(("table", table), db.query(model))
+    (version,) = table_versions(db, [table])
+    cached = _counts.get(("table", table))
+    if cached and cached[1] == version:
+        return cached[0]
+    value = db.query(func.count()).select_from(model).scalar()
+    _store(("table", table), value, version)
+    return value
@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from . import models
+
+def current_month() -> datetime:
+    return datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def dashboard_stats(db: Session, month: datetime) -> dict:
+    total_students = db.query(func.count(models.Student.id)).scalar()
+    total_teachers = db.query(func.count(models.Teacher.id)).scalar()
+    total_courses = db.query(func.count(models.Course.id)).scalar()
+    active_enrollments = db.query(func.count(models.CourseEnrollment.id))\
+        .filter(models.CourseEnrollment.payment_status == "Paid").scalar()
+    
+    # Calculate revenue for current month
+    revenue = db.query(func.sum(models.Course.price))\
+        .join(models.CourseEnrollment)\
+        .filter(
+            models.CourseEnrollment.payment_status == "Paid",
+            models.CourseEnrollment.enrollment_date >= month
+        ).scalar() or 0.0
+
+    return {
+        "total_students": total_students,
+        "total_teachers": total_teachers,
+        "total_courses": total_courses,
+        "active_enrollments": active_enrollments,
+        "revenue_this_month": revenue
+    }
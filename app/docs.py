@@ -1,11 +1,19 @@
+import hashlib
+import json
+import os
+from os import getenv
+from typing import Dict, Optional
+from fastapi import FastAPI, Request, Response
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
-from typing import Dict
 
-def custom_openapi() -> Dict:
+OPENAPI_URL = "/openapi.json"
+# A schema written by `python -m app.docs --output <file>`; served as is instead of generating one
+OPENAPI_FILE = getenv("OPENAPI_FILE")
+
+def custom_openapi(app: FastAPI) -> Dict:
     """Generate custom OpenAPI schema with organized tags and descriptions."""
     
-    from .main import app  # Import here to avoid circular import
-    
     openapi_schema = get_openapi(
         title="ELTS API",
         version="1.0.0",
@@ -43,6 +51,26 @@ def custom_openapi() -> Dict:
         {
             "name": "Enrollments",
             "description": "Course enrollment operations and management"
+        },
+        {
+            "name": "Reports",
+            "description": "Revenue reports served from pre-aggregated rollups"
+        },
+        {
+            "name": "Jobs",
+            "description": "Background jobs for long-running operations"
+        },
+        {
+            "name": "Archive",
+            "description": "Moving inactive students and finished enrollments to cold storage and back"
+        },
+        {
+            "name": "Audit",
+            "description": "Who activated, deactivated or deleted students, teachers and courses"
+        },
+        {
+            "name": "Diagnostics",
+            "description": "Slow query statistics of the serving worker"
         }
     ]
 
@@ -63,6 +91,10 @@ def custom_openapi() -> Dict:
             path_lower = path_url.lower()
             if "/token" in path_lower or "/users" in path_lower:
                 method["tags"] = ["Authentication"]
+            elif "/reports" in path_lower:
+                method["tags"] = ["Reports"]
+            elif "/archive" in path_lower:
+                method["tags"] = ["Archive"]
             elif "/dashboard" in path_lower or "/health" in path_lower:
                 method["tags"] = ["Dashboard"]
             elif "/students" in path_lower:
@@ -73,8 +105,71 @@ def custom_openapi() -> Dict:
                 method["tags"] = ["Courses"]
             elif "/enrollments" in path_lower:
                 method["tags"] = ["Enrollments"]
+            elif "/jobs" in path_lower:
+                method["tags"] = ["Jobs"]
+            elif "/audit" in path_lower:
+                method["tags"] = ["Audit"]
+            elif "/diagnostics" in path_lower:
+                method["tags"] = ["Diagnostics"]
             else:
                 # Hide any untagged endpoints by assigning them to a hidden group
                 method["tags"] = ["hidden"]
 
     return openapi_schema
+
+class OpenAPIDocument:
+    """The schema serialized once, with the ETag clients revalidate against."""
+
+    def __init__(self):
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+
+    def load(self, app: FastAPI):
+        if OPENAPI_FILE and os.path.exists(OPENAPI_FILE):
+            with open(OPENAPI_FILE, "rb") as file:
+                body = file.read()
+        else:
+            body = json.dumps(custom_openapi(app), separators=(",", ":")).encode()
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    def schema(self, app: FastAPI) -> Dict:
+        if self.body is None:
+            self.load(app)
+        return json.loads(self.body)
+
+    def response(self, request: Request) -> Response:
+        if self.body is None:
+            self.load(request.app)
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+openapi_document = OpenAPIDocument()
+
+def install_docs(app: FastAPI):
+    """Serves the custom schema and the docs pages; create the app with openapi_url=None, docs_url=None and redoc_url=None."""
+    app.openapi = lambda: openapi_document.schema(app)
+
+    @app.get(OPENAPI_URL, include_in_schema=False)
+    async def openapi_json(request: Request):
+        return openapi_document.response(request)
+
+    @app.get("/docs", include_in_schema=False)
+    async def swagger_ui():
+        return get_swagger_ui_html(openapi_url=OPENAPI_URL, title=f"{app.title} - Swagger UI")
+
+    @app.get("/redoc", include_in_schema=False)
+    async def redoc():
+        return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Writes the OpenAPI schema to a file, to be served through OPENAPI_FILE.")
+    parser.add_argument("--output", default="openapi.json")
+    args = parser.parse_args()
+    from main import app
+    with open(args.output, "w") as file:
+        json.dump(custom_openapi(app), file, separators=(",", ":"))
+    print(f"Wrote {args.output}")
@@ -0,0 +1,217 @@
+import asyncio
+from os import getenv
+from typing import Dict, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session, aliased
+from . import models, schemas
+from .database import SessionLocal
+from .queries import course_enrollment_count
+from .revenue import PAID, adjust_paid_enrollments
+
+# With the queue on, POST /enrollments/ requests for the same course are committed
+# together by one task per course instead of each racing on the course's rows
+ENROLLMENT_QUEUE_ENABLED = getenv("ENROLLMENT_QUEUE", "false").lower() == "true"
+# Requests committed per transaction
+ENROLLMENT_BATCH_SIZE = int(getenv("ENROLLMENT_BATCH_SIZE", "50"))
+# How long the first request of a burst waits for others to join its batch
+ENROLLMENT_BATCH_SECONDS = float(getenv("ENROLLMENT_BATCH_SECONDS", "0.005"))
+# Requests waiting per course and worker before new ones get 503
+ENROLLMENT_QUEUE_MAX = int(getenv("ENROLLMENT_QUEUE_MAX", "1000"))
+
+def _waitlist_entry(entry: models.WaitlistEntry, position: int) -> schemas.WaitlistEntry:
+    return schemas.WaitlistEntry(
+        id=entry.id, course_id=entry.course_id, student_id=entry.student_id,
+        payment_status=entry.payment_status, created_at=entry.created_at, position=position
+    )
+
+def _promote(db: Session, course_id: int, places: int) -> List[models.WaitlistEntry]:
+    """Enrolls up to `places` students from the head of the waitlist; the caller holds the course lock."""
+    if not places:
+        return []
+    entries = db.query(models.WaitlistEntry)\
+        .filter(models.WaitlistEntry.course_id == course_id)\
+        .order_by(models.WaitlistEntry.id)\
+        .limit(places)\
+        .all()
+    if not entries:
+        return []
+    db.add_all(
+        models.CourseEnrollment(student_id=entry.student_id, course_id=course_id, payment_status=entry.payment_status)
+        for entry in entries
+    )
+    paid = sum(1 for entry in entries if entry.payment_status == PAID)
+    if paid:
+        adjust_paid_enrollments(db, course_id, paid)
+    db.execute(delete(models.WaitlistEntry).where(models.WaitlistEntry.id.in_([entry.id for entry in entries])))
+    return entries
+
+def commit_batch(course_id: int, requests: List[schemas.EnrollmentCreate]) -> list:
+    """Enrolls as many of `requests` as the course has places for and waitlists the rest.
+
+    One transaction and one capacity check for the whole batch. The course row is
+    locked, so batches from other workers (and the bulk endpoint) wait their turn and
+    the course is never oversold. Students already enrolled or waitlisted get their
+    existing row back. Returns, per request, an Enrollment, a WaitlistEntry or the
+    HTTPException its caller should get.
+    """
+    with SessionLocal(expire_on_commit=False) as db:
+        course = db.query(models.Course).filter(models.Course.id == course_id).with_for_update().first()
+        if not course:
+            return [HTTPException(status_code=404, detail="Course not found")] * len(requests)
+        known = {
+            student_id for (student_id,) in db.query(models.Student.id)
+            .filter(models.Student.id.in_({request.student_id for request in requests}))
+        }
+        places = max((course.max_students or 0) - course_enrollment_count(db, course_id), 0)
+        waiting = db.query(func.count(models.WaitlistEntry.id))\
+            .filter(models.WaitlistEntry.course_id == course_id).scalar()
+        # Places freed since the last batch go to the waitlist first
+        promoted = len(_promote(db, course_id, places))
+        places, waiting = places - promoted, waiting - promoted
+        # The session does not autoflush, and the lookup below must see the students just promoted
+        db.flush()
+        # Students already in the course or on its waitlist get their existing row back
+        existing = {
+            enrollment.student_id: enrollment for enrollment in db.query(models.CourseEnrollment)
+            .filter(models.CourseEnrollment.course_id == course_id, models.CourseEnrollment.student_id.in_(known))
+        }
+        ahead = aliased(models.WaitlistEntry)
+        position = select(func.count(ahead.id))\
+            .where(ahead.course_id == course_id, ahead.id <= models.WaitlistEntry.id)\
+            .scalar_subquery()
+        existing.update(
+            (entry.student_id, (entry, entry_position)) for entry, entry_position in db.query(models.WaitlistEntry, position)
+            .filter(models.WaitlistEntry.course_id == course_id, models.WaitlistEntry.student_id.in_(known))
+        )
+        rows, new = [], []
+        for request in requests:
+            if request.student_id not in known:
+                rows.append(HTTPException(status_code=404, detail="Student not found"))
+                continue
+            if request.student_id not in existing:
+                if places and not waiting:
+                    places -= 1
+                    row = models.CourseEnrollment(**request.dict())
+                    new.append(row)
+                else:
+                    waiting += 1
+                    row = (models.WaitlistEntry(**request.dict()), waiting)
+                    new.append(row[0])
+                # A repeat later in the batch gets this same row
+                existing[request.student_id] = row
+            rows.append(existing[request.student_id])
+        db.add_all(new)
+        paid = sum(1 for row in new if isinstance(row, models.CourseEnrollment) and row.payment_status == PAID)
+        if paid:
+            adjust_paid_enrollments(db, course_id, paid)
+        db.commit()
+
+    results = []
+    for row in rows:
+        if isinstance(row, models.CourseEnrollment):
+            results.append(schemas.Enrollment.model_validate(row))
+        elif isinstance(row, tuple):
+            results.append(_waitlist_entry(*row))
+        else:
+            results.append(row)
+    return results
+
+class EnrollmentQueue:
+    """Per-course queues of pending enrollment requests, drained by one task per course.
+
+    While a batch is being committed the next requests pile up behind it, so the
+    batch size follows the load: one request at a time when quiet, up to
+    ENROLLMENT_BATCH_SIZE per transaction on registration day.
+    """
+
+    def __init__(self, batch_size: int, batch_seconds: float, max_pending: int):
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        self.max_pending = max_pending
+        self.pending: Dict[int, List[Tuple[schemas.EnrollmentCreate, asyncio.Future]]] = {}
+        self.batches = 0
+        self.enrolled = 0
+        self.waitlisted = 0
+        self.rejected = 0
+
+    async def submit(self, request: schemas.EnrollmentCreate):
+        """Waits for the batch holding `request` to commit; returns an Enrollment or a WaitlistEntry."""
+        course_id = request.course_id
+        if len(self.pending.get(course_id, ())) >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many enrollment requests for this course", headers={"Retry-After": "1"})
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if course_id not in self.pending:
+            self.pending[course_id] = []
+            loop.create_task(self._drain(course_id))
+        self.pending[course_id].append((request, future))
+        result = await future
+        if isinstance(result, HTTPException):
+            raise result
+        return result
+
+    async def _drain(self, course_id: int):
+        loop = asyncio.get_running_loop()
+        queue = self.pending[course_id]
+        try:
+            await asyncio.sleep(self.batch_seconds)
+            while queue:
+                batch = [item for item in queue[:self.batch_size] if not item[1].cancelled()]
+                del queue[:self.batch_size]
+                if not batch:
+                    continue
+                try:
+                    results = await loop.run_in_executor(None, commit_batch, course_id, [request for request, _ in batch])
+                except Exception as exc:
+                    results = [exc] * len(batch)
+                self.batches += 1
+                for (_, future), result in zip(batch, results):
+                    if isinstance(result, schemas.Enrollment):
+                        self.enrolled += 1
+                    elif isinstance(result, schemas.WaitlistEntry):
+                        self.waitlisted += 1
+                    if future.cancelled():
+                        continue
+                    if isinstance(result, Exception) and not isinstance(result, HTTPException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        finally:
+            # Nothing awaits between the last check and here, so no request is stranded
+            del self.pending[course_id]
+
+    def stats(self) -> dict:
+        return {
+            "courses_pending": len(self.pending),
+            "requests_pending": sum(len(queue) for queue in self.pending.values()),
+            "batches": self.batches,
+            "enrolled": self.enrolled,
+            "waitlisted": self.waitlisted,
+            "rejected": self.rejected,
+        }
+
+enrollment_queue = EnrollmentQueue(ENROLLMENT_BATCH_SIZE, ENROLLMENT_BATCH_SECONDS, ENROLLMENT_QUEUE_MAX)
+
+def waitlist(db: Session, course_id: int) -> List[schemas.WaitlistEntry]:
+    entries = db.query(models.WaitlistEntry)\
+        .filter(models.WaitlistEntry.course_id == course_id)\
+        .order_by(models.WaitlistEntry.id)\
+        .all()
+    return [_waitlist_entry(entry, position) for position, entry in enumerate(entries, 1)]
+
+def promote_waitlist(db: Session, course_id: int) -> dict:
+    """Moves students from the head of the waitlist into the course while it has places.
+
+    Queued enrollment batches do this on their own; call it after raising max_students
+    or removing enrollments when no new requests are coming in.
+    """
+    course = db.query(models.Course).filter(models.Course.id == course_id).with_for_update().first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    entries = _promote(db, course_id, max((course.max_students or 0) - course_enrollment_count(db, course_id), 0))
+    waiting = db.query(func.count(models.WaitlistEntry.id))\
+        .filter(models.WaitlistEntry.course_id == course_id).scalar()
+    db.commit()
+    return {"course_id": course_id, "enrolled": [entry.student_id for entry in entries], "waiting": waiting}
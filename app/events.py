@@ -0,0 +1,155 @@
+import asyncio
+from os import getenv
+from typing import List, Optional, Set
+from sqlalchemy import func
+from . import models, schemas
+from .cache import VERSIONED_TABLES, commit_listeners, table_versions
+from .dashboard import current_month, dashboard_stats
+from .database import SessionLocal
+
+# Open streams allowed per worker process
+SSE_MAX_SUBSCRIBERS = int(getenv("SSE_MAX_SUBSCRIBERS", "100"))
+# A comment line is sent after this much silence so proxies keep the stream open
+SSE_HEARTBEAT_SECONDS = float(getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# After a commit, wait this long so a burst of writes costs a single recomputation
+SSE_DEBOUNCE_SECONDS = float(getenv("SSE_DEBOUNCE_SECONDS", "0.5"))
+# Commits made by other workers are noticed by checking table_versions this often
+SSE_POLL_SECONDS = float(getenv("SSE_POLL_SECONDS", "5"))
+# Newest enrollments announced per recomputation; older ones in a large burst are skipped
+SSE_MAX_ENROLLMENT_EVENTS = 50
+SUBSCRIBER_QUEUE_SIZE = 100
+
+_CLOSE = "close"
+
+def format_event(name: str, data: str) -> str:
+    return f"event: {name}\ndata: {data}\n\n"
+
+class DashboardBroker:
+    """Fans dashboard stats and new enrollments out to every open stream of this worker.
+
+    One background task per worker recomputes the stats while anyone is
+    subscribed, instead of every open tab polling /dashboard/stats/.
+    """
+
+    def __init__(self, max_subscribers: int):
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.recomputations = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+        commit_listeners.append(self.notify)
+
+    def _reset(self):
+        self.versions = None
+        self.month = None
+        self.stats_event: Optional[str] = None
+        self.last_enrollment_id: Optional[int] = None
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def notify(self, tables: Set[str]):
+        """Commit listener; runs on whichever thread committed."""
+        loop = self._loop
+        if loop is None or not self.subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dirty.set)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    async def stream(self):
+        """Yields the SSE messages of one subscriber until it disconnects or falls behind."""
+        if self.full:
+            return
+        queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._dirty = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+        try:
+            yield "retry: 5000\n\n"
+            if self.stats_event:
+                yield self.stats_event
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                if message is _CLOSE:
+                    return
+                yield message
+        finally:
+            self.subscribers.discard(queue)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.subscribers:
+                self._publish(await loop.run_in_executor(None, self._refresh))
+                try:
+                    await asyncio.wait_for(self._dirty.wait(), SSE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                else:
+                    await asyncio.sleep(SSE_DEBOUNCE_SECONDS)
+                self._dirty.clear()
+        finally:
+            # Nobody kept the snapshot current, so the next subscriber starts afresh
+            self._reset()
+
+    def _refresh(self) -> List[str]:
+        """Recomputes the stats if any versioned table changed; runs in the threadpool."""
+        with SessionLocal() as db:
+            month = current_month()
+            versions = table_versions(db, VERSIONED_TABLES)
+            if versions == self.versions and month == self.month:
+                return []
+            messages = []
+            if self.last_enrollment_id is None:
+                self.last_enrollment_id = db.query(func.max(models.CourseEnrollment.id)).scalar() or 0
+            else:
+                enrollments = db.query(models.CourseEnrollment)\
+                    .filter(models.CourseEnrollment.id > self.last_enrollment_id)\
+                    .order_by(models.CourseEnrollment.id.desc())\
+                    .limit(SSE_MAX_ENROLLMENT_EVENTS)\
+                    .all()
+                for enrollment in reversed(enrollments):
+                    messages.append(format_event("enrollment", schemas.Enrollment.model_validate(enrollment).model_dump_json()))
+                if enrollments:
+                    self.last_enrollment_id = enrollments[0].id
+            stats = schemas.DashboardStats.model_validate(dashboard_stats(db, month)).model_dump_json()
+            self.recomputations += 1
+        self.versions, self.month = versions, month
+        stats_event = format_event("stats", stats)
+        if stats_event != self.stats_event:
+            self.stats_event = stats_event
+            messages.append(stats_event)
+        return messages
+
+    def _publish(self, messages: List[str]):
+        for queue in list(self.subscribers):
+            for message in messages:
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    # A subscriber this far behind is dropped; its EventSource reconnects
+                    self.subscribers.discard(queue)
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(_CLOSE)
+                    break
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "max_subscribers": self.max_subscribers,
+            "recomputations": self.recomputations,
+        }
+
+broker = DashboardBroker(SSE_MAX_SUBSCRIBERS)
@@ -0,0 +1,125 @@
+import csv
+import io
+import os
+import uuid
+from os import getenv
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+# Rows validated, de-duplicated and inserted together
+IMPORT_BATCH_SIZE = int(getenv("IMPORT_BATCH_SIZE", "1000"))
+# Where per-row error reports are written for later download
+IMPORT_REPORT_DIR = getenv("IMPORT_REPORT_DIR", "import_reports")
+
+def report_path(report_id: str) -> Optional[str]:
+    """Returns the path of an existing error report, or None for unknown ids."""
+    try:
+        uuid.UUID(hex=report_id)
+    except ValueError:
+        return None
+    path = os.path.join(IMPORT_REPORT_DIR, f"{report_id}.csv")
+    return path if os.path.exists(path) else None
+
+class ErrorReport:
+    """Streams failed rows to a CSV file, created only once the first error occurs."""
+
+    def __init__(self):
+        self.report_id = uuid.uuid4().hex
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, line: int, email: Optional[str], error: str):
+        if self._writer is None:
+            os.makedirs(IMPORT_REPORT_DIR, exist_ok=True)
+            self._file = open(os.path.join(IMPORT_REPORT_DIR, f"{self.report_id}.csv"), "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["line", "email", "error"])
+        self._writer.writerow([line, email or "", error])
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+def _read_batches(upload: BinaryIO, batch_size: int) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+    """Yields (line number, row) batches without reading the whole upload into memory."""
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""))
+    batch = []
+    for row in reader:
+        batch.append((reader.line_num, row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in error.errors())
+
+def import_students(db: Session, upload: BinaryIO, batch_size: Optional[int] = None) -> dict:
+    """Imports students from a CSV upload in batches, committing after each batch.
+
+    Each batch costs one email lookup and one multi-row insert. Emails already seen
+    earlier in the file are tracked in memory so duplicates within the upload are
+    rejected without touching the database. Emails are compared case-insensitively,
+    like the unique index on MySQL.
+    """
+    seen_emails = set()
+    report = ErrorReport()
+    imported = 0
+    rows = 0
+    try:
+        for batch in _read_batches(upload, batch_size or IMPORT_BATCH_SIZE):
+            rows += len(batch)
+            valid = []
+            for line, row in batch:
+                # DictReader puts fields beyond the header under the key None
+                if None in row:
+                    report.add(line, row.get("email"), "More fields than the header")
+                    continue
+                try:
+                    student = schemas.StudentCreate(**row)
+                except ValidationError as e:
+                    report.add(line, row.get("email"), _format_error(e))
+                    continue
+                if student.email.lower() in seen_emails:
+                    report.add(line, student.email, "Duplicate email in upload")
+                    continue
+                seen_emails.add(student.email.lower())
+                valid.append((line, student))
+
+            # MySQL's default collation matches case variants here while keeping the email index usable
+            existing = {
+                email.lower() for (email,) in db.query(models.Student.email)
+                .filter(models.Student.email.in_([student.email.lower() for _, student in valid]))
+            } if valid else set()
+
+            to_insert = []
+            for line, student in valid:
+                if student.email.lower() in existing:
+                    report.add(line, student.email, "Email already registered")
+                else:
+                    to_insert.append(student.model_dump())
+            if to_insert:
+                db.execute(insert(models.Student), to_insert)
+                db.commit()
+                imported += len(to_insert)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File is not UTF-8 encoded text; {imported} students were imported before the undecodable row"
+        )
+    finally:
+        report.close()
+
+    return {
+        "rows": rows,
+        "imported": imported,
+        "failed": report.count,
+        "error_report_id": report.report_id if report.count else None,
+    }
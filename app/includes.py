@@ -0,0 +1,26 @@
+from typing import Optional, Set
+from fastapi import HTTPException
+
+def parse_include(include: Optional[str], allowed: Set[str]) -> Set[str]:
+    """Parses a comma-separated ?include= value, rejecting names the endpoint does not support."""
+    if not include:
+        return set()
+    requested = {name.strip() for name in include.split(",") if name.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(allowed))}"
+        )
+    return requested
+
+def with_includes(obj, includes: Set[str], **aggregates) -> dict:
+    """Builds a response dict from the row's columns plus the requested relations and aggregates.
+
+    Relations must already be eager loaded by the caller, otherwise each access here
+    would issue its own lazy-load query.
+    """
+    data = {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+    for name in includes:
+        data[name] = aggregates[name] if name in aggregates else getattr(obj, name)
+    return data
@@ -0,0 +1,253 @@
+import logging
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from os import getenv
+from typing import Callable, Dict, Optional, Type
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Total worker threads shared by every job type
+JOB_WORKERS = int(getenv("JOB_WORKERS", "4"))
+# Jobs waiting for a slot in this process before enqueueing is refused
+JOB_QUEUE_LIMIT = int(getenv("JOB_QUEUE_LIMIT", "1000"))
+# Each process stamps heartbeat_at on the jobs it is running this often...
+JOB_HEARTBEAT_SECONDS = float(getenv("JOB_HEARTBEAT_SECONDS", "15"))
+# ...and marks running jobs whose heartbeat is older than this as failed, since their worker is gone
+JOB_STALE_SECONDS = float(getenv("JOB_STALE_SECONDS", "120"))
+
+class JobCancelled(Exception):
+    """Raised inside a handler once cancellation of its job has been requested."""
+
+class JobContext:
+    """Handed to job handlers to report progress and observe cancellation."""
+
+    def __init__(self, runner: "JobRunner", job_id: int):
+        self.runner = runner
+        self.job_id = job_id
+
+    @property
+    def cancelled(self) -> bool:
+        return self.runner.is_cancel_requested(self.job_id)
+
+    def progress(self, processed: int, total: Optional[int] = None):
+        """Persists progress and raises JobCancelled if the job should stop."""
+        values = {"processed": processed, "heartbeat_at": datetime.utcnow()}
+        if total is not None:
+            values["total"] = total
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            db.commit()
+        if self.cancelled:
+            raise JobCancelled()
+
+class JobRunner:
+    """Runs persisted jobs on a bounded thread pool with a concurrency limit per job type."""
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_limit: int = JOB_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.handlers: Dict[str, Callable] = {}
+        self.limits: Dict[str, int] = {}
+        self.params: Dict[str, Type[BaseModel]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._heartbeat: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._active = set()
+        self._lock = threading.Lock()
+        self._pending = defaultdict(deque)
+        self._running = defaultdict(int)
+        self._cancel_requested = set()
+
+    def register(self, job_type: str, max_concurrency: int = 1, params: Optional[Type[BaseModel]] = None):
+        """Decorator registering `handler(ctx, params) -> result` for a job type.
+
+        With a `params` model, params are validated when the job is enqueued and the
+        handler receives them with defaults filled in.
+        """
+        def decorator(handler: Callable) -> Callable:
+            self.handlers[job_type] = handler
+            self.limits[job_type] = max_concurrency
+            if params:
+                self.params[job_type] = params
+            return handler
+        return decorator
+
+    def start(self):
+        """Starts the pool and picks up jobs left queued by a previous process."""
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+        self._heartbeat.start()
+        self.fail_stale()
+        with SessionLocal() as db:
+            queued = db.query(Job.id, Job.job_type).filter(Job.status == "queued").order_by(Job.id).all()
+        for job_id, job_type in queued:
+            if job_type in self.handlers:
+                self._submit(job_id, job_type)
+
+    def shutdown(self):
+        if self._executor:
+            with self._lock:
+                self._cancel_requested.update(
+                    job_id for queue in self._pending.values() for job_id in queue
+                )
+                self._pending.clear()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+            self._heartbeat = None
+
+    def _beat(self):
+        while not self._stop.wait(JOB_HEARTBEAT_SECONDS):
+            try:
+                self.heartbeat()
+                self.fail_stale()
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+    def heartbeat(self):
+        """Stamps heartbeat_at on the jobs this process is running."""
+        with self._lock:
+            active = list(self._active)
+        if active:
+            with SessionLocal() as db:
+                db.execute(update(Job).where(Job.id.in_(active), Job.status == "running").values(heartbeat_at=datetime.utcnow()))
+                db.commit()
+
+    def fail_stale(self) -> int:
+        """Fails running jobs whose worker stopped sending heartbeats, e.g. one killed mid-job.
+
+        They are not requeued, since the handler may have stopped halfway through.
+        """
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            failed = db.execute(
+                update(Job)
+                .where(Job.status == "running", func.coalesce(Job.heartbeat_at, Job.started_at) < now - timedelta(seconds=JOB_STALE_SECONDS))
+                .values(status="failed", error="The worker running this job stopped", finished_at=now)
+            ).rowcount
+            db.commit()
+        if failed:
+            logger.warning("Marked %d job(s) left running by a stopped worker as failed", failed)
+        return failed
+
+    def enqueue(self, db: Session, job_type: str, params: Optional[dict] = None) -> Job:
+        if job_type not in self.handlers:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown job type: {job_type}. Allowed: {', '.join(sorted(self.handlers))}"
+            )
+        schema = self.params.get(job_type)
+        if schema:
+            try:
+                params = schema.model_validate(params or {}).model_dump()
+            except ValidationError as e:
+                raise RequestValidationError([
+                    {**error, "loc": ("body", "params", *error["loc"])} for error in e.errors(include_url=False, include_context=False)
+                ])
+        if self.queued_count() >= self.queue_limit:
+            raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "30"})
+        job = Job(job_type=job_type, params=params or {}, status="queued", processed=0, cancel_requested=False)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        self._submit(job.id, job_type)
+        return job
+
+    def cancel(self, db: Session, job: Job) -> Job:
+        """Cancels a queued job immediately; a running job stops at its next progress report."""
+        if job.status in ("succeeded", "failed", "cancelled"):
+            raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+        with self._lock:
+            self._cancel_requested.add(job.id)
+            queue = self._pending.get(job.job_type)
+            was_pending = queue is not None and job.id in queue
+            if was_pending:
+                queue.remove(job.id)
+        job.cancel_requested = True
+        if was_pending or job.status == "queued":
+            job.status = "cancelled"
+            job.finished_at = datetime.utcnow()
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        if job_id in self._cancel_requested:
+            return True
+        # Cancellation may have been requested through another worker process
+        with SessionLocal() as db:
+            return bool(db.query(Job.cancel_requested).filter(Job.id == job_id).scalar())
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._pending.values())
+
+    def _submit(self, job_id: int, job_type: str):
+        with self._lock:
+            self._pending[job_type].append(job_id)
+        self._dispatch()
+
+    def _dispatch(self):
+        if not self._executor:
+            return
+        with self._lock:
+            for job_type, queue in self._pending.items():
+                while queue and self._running[job_type] < self.limits[job_type]:
+                    self._running[job_type] += 1
+                    self._executor.submit(self._run, queue.popleft(), job_type)
+
+    def _run(self, job_id: int, job_type: str):
+        try:
+            self._execute(job_id, job_type)
+        finally:
+            with self._lock:
+                self._running[job_type] -= 1
+                self._cancel_requested.discard(job_id)
+            self._dispatch()
+
+    def _execute(self, job_id: int, job_type: str):
+        with SessionLocal() as db:
+            # Claim the job atomically so only one process ever runs it
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued", Job.cancel_requested.is_(False))
+                .values(status="running", started_at=datetime.utcnow(), heartbeat_at=datetime.utcnow())
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return
+            params = db.query(Job.params).filter(Job.id == job_id).scalar() or {}
+
+        with self._lock:
+            self._active.add(job_id)
+        values = {}
+        try:
+            values["result"] = self.handlers[job_type](JobContext(self, job_id), params)
+            values["status"] = "succeeded"
+        except JobCancelled:
+            values["status"] = "cancelled"
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job_type)
+            values["status"] = "failed"
+            values["error"] = str(e)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+        values["finished_at"] = datetime.utcnow()
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == job_id).values(**values))
+            db.commit()
+
+runner = JobRunner()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, Boolean, Text, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -26,6 +26,7 @@ class Student(Base):
     level = Column(String(20))  # Beginner, Intermediate, Advanced
     enrollment_date = Column(DateTime, default=datetime.utcnow)
     active = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     enrollments = relationship("CourseEnrollment", back_populates="student")
 
 class Teacher(Base):
@@ -39,10 +40,13 @@ class Teacher(Base):
     specialization = Column(String(100))
     bio = Column(Text)
     active = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     courses = relationship("Course", back_populates="teacher")
 
 class Course(Base):
     __tablename__ = "courses"
+    # Schedule conflict checks seek a teacher's courses by end date (see schedule.py)
+    __table_args__ = (Index("ix_courses_teacher_schedule", "teacher_id", "end_date", "start_date"),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100))
@@ -54,6 +58,7 @@ class Course(Base):
     end_date = Column(DateTime)
     teacher_id = Column(Integer, ForeignKey("teachers.id"))
     active = Column(Boolean, default=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     teacher = relationship("Teacher", back_populates="courses")
     enrollments = relationship("CourseEnrollment", back_populates="course")
@@ -66,6 +71,104 @@ class CourseEnrollment(Base):
     course_id = Column(Integer, ForeignKey("courses.id"))
     enrollment_date = Column(DateTime, default=datetime.utcnow)
     payment_status = Column(String(20))  # Pending, Paid, Refunded
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     student = relationship("Student", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
+
+class WaitlistEntry(Base):
+    """A student waiting for a place in a full course; the lowest id is first in line."""
+    __tablename__ = "course_waitlist"
+
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True, nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"), index=True, nullable=False)
+    payment_status = Column(String(20))  # Applied to the enrollment once promoted
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), index=True)
+    status = Column(String(20), index=True, default="queued")  # queued, running, succeeded, failed, cancelled
+    params = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    processed = Column(Integer, default=0)
+    total = Column(Integer)
+    cancel_requested = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # Refreshed while running; a stale one means the worker died
+
+class RevenueRollup(Base):
+    """Revenue recognised per course and month, kept current by enrollment and payment writes."""
+    __tablename__ = "revenue_rollups"
+    __table_args__ = (UniqueConstraint("course_id", "month", name="uq_revenue_rollups_course_month"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(Date, index=True)  # First day of the month
+    course_id = Column(Integer, ForeignKey("courses.id"), index=True)
+    teacher_id = Column(Integer, index=True)
+    level = Column(String(20))
+    share = Column(Float)  # Revenue recognised this month for one paid enrollment
+    paid_enrollments = Column(Integer, default=0)
+
+class TableVersion(Base):
+    """Write counter per table, bumped in the same transaction as every write to it."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+
+class DeletedRow(Base):
+    """Tombstone left by every delete from a synced table, read by the /changes endpoints."""
+    __tablename__ = "deleted_rows"
+    __table_args__ = (Index("ix_deleted_rows_table_deleted_at", "table_name", "deleted_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    table_name = Column(String(64), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class AuditEvent(Base):
+    """Who activated, deactivated or deleted which row; written in batches by app.audit."""
+    __tablename__ = "audit_events"
+    __table_args__ = (Index("ix_audit_events_entity", "entity", "entity_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    occurred_at = Column(DateTime, index=True, nullable=False)
+    actor = Column(String(255), index=True)
+    client = Column(String(64))
+    action = Column(String(20), nullable=False)  # activate, deactivate, delete
+    entity = Column(String(64), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+
+class ArchivedStudent(Base):
+    """Cold copy of an inactive student moved out of `students` by app.archive."""
+    __tablename__ = "archived_students"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Kept from students, reused on restore
+    first_name = Column(String(50))
+    last_name = Column(String(50))
+    email = Column(String(255), index=True)
+    phone = Column(String(20))
+    level = Column(String(20))
+    enrollment_date = Column(DateTime)
+    active = Column(Boolean)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, index=True)
+
+class ArchivedEnrollment(Base):
+    """Cold copy of an enrollment moved out of `course_enrollments` by app.archive."""
+    __tablename__ = "archived_enrollments"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Kept from course_enrollments, reused on restore
+    student_id = Column(Integer, index=True)
+    course_id = Column(Integer, index=True)
+    enrollment_date = Column(DateTime)
+    payment_status = Column(String(20))
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, index=True)
@@ -0,0 +1,171 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from os import getenv
+from typing import Optional
+
+# Off by default; when off the middleware is not installed at all
+PROFILING_ENABLED = getenv("PROFILING", "false").lower() == "true"
+PROFILE_DIR = getenv("PROFILE_DIR", "profiles")
+# "cprofile" records every call; "sample" records the stack every PROFILE_INTERVAL seconds
+PROFILE_MODE = getenv("PROFILE_MODE", "cprofile")
+PROFILE_INTERVAL = float(getenv("PROFILE_INTERVAL", "0.001"))
+# Share of all requests profiled without being asked, e.g. 0.01
+PROFILE_SAMPLE_RATE = float(getenv("PROFILE_SAMPLE_RATE", "0"))
+# Oldest profiles are deleted beyond this many files
+PROFILE_MAX_FILES = int(getenv("PROFILE_MAX_FILES", "500"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_PARAM = re.compile(rb"(?:^|&)profile=([a-z0-9]*)")
+MODES = {"cprofile", "sample"}
+# Python allows one cProfile at a time per thread; overlapping requests are sampled instead
+_cprofile_active = False
+
+class StackSampler:
+    """Counts the stacks of one thread every `interval` seconds, in folded flame graph format."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def _is_admin(authorization: str) -> bool:
+    if not authorization.lower().startswith("bearer "):
+        return False
+    from jose import JWTError, jwt
+    from .auth import SECRET_KEY, ALGORITHM
+    from .database import SessionLocal
+    from .models import User
+    try:
+        email = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return False
+    with SessionLocal() as db:
+        return bool(db.query(User.is_admin).filter(User.email == email).scalar())
+
+def _prune(directory: str, keep: int):
+    files = sorted((entry for entry in os.scandir(directory) if entry.is_file()), key=lambda entry: entry.stat().st_mtime)
+    for entry in files[:max(len(files) - keep, 0)]:
+        os.remove(entry.path)
+
+def save_profile(request_id: str, method: str, path: str, elapsed: float,
+                 profiler: Optional[cProfile.Profile] = None, sampler: Optional[StackSampler] = None) -> str:
+    """Writes <request_id>.prof (pstats) and .txt (call tree), or .folded for a sampled request."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, request_id)
+    header = f"{method} {path} {elapsed * 1000:.1f} ms\n\n"
+    if profiler:
+        profiler.dump_stats(f"{base}.prof")
+        report = io.StringIO()
+        stats = pstats.Stats(profiler, stream=report).sort_stats("cumulative")
+        stats.print_stats(60)
+        stats.print_callees(30)
+        with open(f"{base}.txt", "w") as file:
+            file.write(header + report.getvalue())
+    else:
+        # Feed to flamegraph.pl or drop into speedscope
+        with open(f"{base}.folded", "w") as file:
+            file.write(sampler.folded())
+    _prune(PROFILE_DIR, PROFILE_MAX_FILES)
+    return base
+
+class ProfilingMiddleware:
+    """Profiles requests carrying `X-Profile: cprofile|sample` (or ?profile=) from an admin,
+    plus PROFILE_SAMPLE_RATE of all requests.
+
+    Profiles cover the event loop thread, where the async handlers run, and are saved
+    under PROFILE_DIR by request id; the id is returned in `X-Profile-Id`. Requests
+    running concurrently on the loop show up in the same profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = await self._requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        global _cprofile_active
+        if mode == "cprofile" and _cprofile_active:
+            mode = "sample"
+        request_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-profile-id", request_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile() if mode == "cprofile" else None
+        sampler = None if profiler else StackSampler(threading.get_ident(), PROFILE_INTERVAL)
+        started = time.perf_counter()
+        if profiler:
+            _cprofile_active = True
+            profiler.enable()
+        else:
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler:
+                profiler.disable()
+                _cprofile_active = False
+            else:
+                sampler.stop()
+            elapsed = time.perf_counter() - started
+            await asyncio.get_running_loop().run_in_executor(
+                None, save_profile, request_id, scope["method"], scope["path"], elapsed, profiler, sampler
+            )
+
+    async def _requested_mode(self, scope) -> Optional[str]:
+        requested = dict(scope["headers"]).get(PROFILE_HEADER)
+        if requested is None:
+            match = PROFILE_PARAM.search(scope.get("query_string", b""))
+            requested = match.group(1) if match else None
+        if requested is not None:
+            mode = requested.decode("latin-1").strip().lower()
+            mode = PROFILE_MODE if mode in ("", "1", "true") else mode
+            authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+            if mode in MODES and await asyncio.get_running_loop().run_in_executor(None, _is_admin, authorization):
+                return mode
+            return None
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return PROFILE_MODE
+        return None
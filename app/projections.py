@@ -0,0 +1,143 @@
+from datetime import date
+from os import getenv
+from typing import List
+import numpy as np
+from sqlalchemy.orm import Session
+from . import models, schemas
+from .revenue import month_start, next_month, paid_counts
+
+# Scenarios are projected in chunks of at most this many scenario x course cells
+# (8 bytes each), so a large request never holds the whole enrollment matrix
+PROJECTION_CHUNK_CELLS = int(getenv("PROJECTION_CHUNK_CELLS", "2000000"))
+
+def month_edges(first: date, last: date) -> np.ndarray:
+    """Day ordinals of the first day of every month from `first` to `last`, plus the month after."""
+    edges = []
+    month = month_start(first)
+    while month <= last:
+        edges.append(month.toordinal())
+        month = next_month(month)
+    edges.append(month.toordinal())
+    return np.array(edges, dtype=np.int64)
+
+class RevenueModel:
+    """Courses loaded into arrays for evaluating many enrollment scenarios at once.
+
+    `shares` is a (courses x months) matrix holding the revenue recognised in each
+    month for one paid enrollment, pro-rated by days exactly like the revenue
+    rollups. A batch of scenarios is then a single matrix product.
+    """
+
+    def __init__(self, course_ids, levels, price, start, end, max_students, paid, first: date, last: date):
+        self.course_ids = np.asarray(course_ids, dtype=np.int64)
+        self.level_names, self.level_codes = np.unique(np.asarray(levels, dtype=str), return_inverse=True)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.max_students = np.asarray(max_students, dtype=np.float64)
+        self.paid = np.asarray(paid, dtype=np.float64)
+        self.edges = month_edges(first, last)
+
+        start = np.asarray(start, dtype=np.int64)
+        end_exclusive = np.asarray(end, dtype=np.int64) + 1
+        # Days of each course falling into each month bucket
+        days = np.minimum(end_exclusive[:, None], self.edges[None, 1:]) \
+            - np.maximum(start[:, None], self.edges[None, :-1])
+        np.clip(days, 0, None, out=days)
+        # Courses running past either end of the window still spread their price over their full length
+        per_day = np.divide(self.price, end_exclusive - start, out=np.zeros_like(self.price), where=end_exclusive > start)
+        self.shares = days * per_day[:, None]
+
+    @classmethod
+    def from_db(cls, db: Session, first: date, last: date, active_only: bool = True) -> "RevenueModel":
+        query = db.query(
+            models.Course.id, models.Course.level, models.Course.price, models.Course.start_date,
+            models.Course.end_date, models.Course.max_students
+        ).filter(
+            models.Course.price.isnot(None),
+            models.Course.start_date.isnot(None),
+            models.Course.end_date.isnot(None),
+            models.Course.start_date < next_month(month_start(last)),
+            models.Course.end_date >= month_start(first),
+        )
+        if active_only:
+            query = query.filter(models.Course.active.is_(True))
+        courses = query.all()
+        paid = paid_counts(db, [c.id for c in courses]) if courses else {}
+        return cls(
+            course_ids=[c.id for c in courses],
+            levels=[c.level for c in courses],
+            price=[c.price for c in courses],
+            start=[c.start_date.date().toordinal() for c in courses],
+            end=[c.end_date.date().toordinal() for c in courses],
+            max_students=[c.max_students or 0 for c in courses],
+            paid=[paid.get(c.id, 0) for c in courses],
+            first=first,
+            last=last,
+        )
+
+    @property
+    def months(self) -> List[str]:
+        return [date.fromordinal(int(ordinal)).strftime("%Y-%m") for ordinal in self.edges[:-1]]
+
+    def enrollment_matrix(self, scenarios: List[schemas.ProjectionScenario]) -> np.ndarray:
+        """Builds the (scenarios x courses) matrix of projected paid enrollments."""
+        fill_rate = np.array([np.nan if s.fill_rate is None else s.fill_rate for s in scenarios])
+        multiplier = np.array([s.enrollment_multiplier for s in scenarios])
+        enrollments = np.where(
+            np.isnan(fill_rate)[:, None],
+            self.paid[None, :] * multiplier[:, None],
+            self.max_students[None, :] * np.nan_to_num(fill_rate)[:, None],
+        )
+
+        # Per-level multipliers as a (scenarios x levels) table gathered onto the courses
+        level_index = {name: i for i, name in enumerate(self.level_names.tolist())}
+        level_multipliers = np.ones((len(scenarios), len(self.level_names)))
+        for k, scenario in enumerate(scenarios):
+            for level, value in scenario.level_multipliers.items():
+                if level in level_index:
+                    level_multipliers[k, level_index[level]] = value
+        enrollments *= level_multipliers[:, self.level_codes]
+
+        # Explicit per-course figures are sparse, so they are scattered in one go
+        overrides = [
+            (k, course_id, count)
+            for k, scenario in enumerate(scenarios)
+            for course_id, count in scenario.course_enrollments.items()
+        ]
+        if overrides and len(self.course_ids):
+            rows, course_ids, counts = (np.array(column) for column in zip(*overrides))
+            order = np.argsort(self.course_ids)
+            positions = np.minimum(np.searchsorted(self.course_ids, course_ids, sorter=order), len(order) - 1)
+            columns = order[positions]
+            # Courses outside the window or unknown are ignored
+            known = self.course_ids[columns] == course_ids
+            enrollments[rows[known], columns[known]] = counts[known]
+
+        capped = np.array([s.cap_at_capacity for s in scenarios], dtype=bool)
+        enrollments[capped] = np.minimum(enrollments[capped], self.max_students[None, :])
+        return enrollments
+
+    def project(self, scenarios: List[schemas.ProjectionScenario]) -> np.ndarray:
+        """Returns the (scenarios x months) matrix of projected revenue."""
+        price_multipliers = np.array([s.price_multiplier for s in scenarios], dtype=np.float64)
+        revenue = np.empty((len(scenarios), len(self.edges) - 1))
+        chunk = max(PROJECTION_CHUNK_CELLS // max(len(self.course_ids), 1), 1)
+        for first in range(0, len(scenarios), chunk):
+            revenue[first:first + chunk] = self.enrollment_matrix(scenarios[first:first + chunk]) @ self.shares
+        return revenue * price_multipliers[:, None]
+
+def project_revenue(db: Session, request: schemas.ProjectionRequest) -> dict:
+    model = RevenueModel.from_db(db, request.start, request.end, request.active_only)
+    revenue = model.project(request.scenarios)
+    totals = revenue.sum(axis=1)
+    return {
+        "months": model.months,
+        "courses": len(model.course_ids),
+        "scenarios": [
+            {
+                "name": scenario.name or str(k),
+                "total": round(float(totals[k]), 2),
+                "monthly": np.round(revenue[k], 2).tolist(),
+            }
+            for k, scenario in enumerate(request.scenarios)
+        ],
+    }
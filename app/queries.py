@@ -0,0 +1,29 @@
+from typing import List, Optional
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import Session
+from . import models
+
+# Statements of the hottest lookups, built once at import and only bound to
+# parameters per call. Rebuilding a Query and its filters on every request costs
+# more Python time than a primary key lookup itself; see scripts/query_benchmark.py.
+
+_BY_ID = {
+    model: select(model).where(model.id == bindparam("id")).limit(1)
+    for model in (models.Student, models.Teacher, models.Course, models.CourseEnrollment, models.Job)
+}
+
+COURSE_ENROLLMENT_COUNT = select(func.count(models.CourseEnrollment.id))\
+    .where(models.CourseEnrollment.course_id == bindparam("course_id"))
+
+COURSE_STUDENTS = select(models.Student)\
+    .join(models.CourseEnrollment, models.Student.id == models.CourseEnrollment.student_id)\
+    .where(models.CourseEnrollment.course_id == bindparam("course_id"))
+
+def get_by_id(db: Session, model, row_id: int) -> Optional[object]:
+    return db.execute(_BY_ID[model], {"id": row_id}).scalars().first()
+
+def course_enrollment_count(db: Session, course_id: int) -> int:
+    return db.execute(COURSE_ENROLLMENT_COUNT, {"course_id": course_id}).scalar()
+
+def course_students(db: Session, course_id: int) -> List[models.Student]:
+    return db.execute(COURSE_STUDENTS, {"course_id": course_id}).scalars().all()
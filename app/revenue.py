@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+from . import models
+from .bulk import BULK_CHUNK_SIZE, chunked
+from .database import SessionLocal
+from .jobs import runner
+
+PAID = "Paid"
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def next_month(value: date) -> date:
+    return date(value.year + 1, 1, 1) if value.month == 12 else date(value.year, value.month + 1, 1)
+
+def month_shares(price: Optional[float], start: Optional[datetime], end: Optional[datetime]) -> List[Tuple[date, float]]:
+    """Splits one enrollment's price across the months of the course, pro-rated by days.
+
+    Both the start and end day count as teaching days, so a course running
+    2026-01-16 to 2026-02-14 recognises 16/30 of its price in January and 14/30 in February.
+    """
+    if not price or not start or not end or end < start:
+        return []
+    first_day, last_day = start.date(), end.date()
+    total_days = (last_day - first_day).days + 1
+    shares = []
+    month = month_start(first_day)
+    while month <= last_day:
+        overlap_start = max(first_day, month)
+        overlap_end = min(last_day, next_month(month) - timedelta(days=1))
+        shares.append((month, price * ((overlap_end - overlap_start).days + 1) / total_days))
+        month = next_month(month)
+    return shares
+
+def paid_counts(db: Session, course_ids: Optional[List[int]] = None) -> Dict[int, int]:
+    """Paid enrollments per course, archived ones included, since archiving does not undo revenue."""
+    counts = defaultdict(int)
+    for model in (models.CourseEnrollment, models.ArchivedEnrollment):
+        query = db.query(model.course_id, func.count(model.id)).filter(model.payment_status == PAID)
+        if course_ids is not None:
+            query = query.filter(model.course_id.in_(course_ids))
+        for course_id, count in query.group_by(model.course_id):
+            counts[course_id] += count
+    return counts
+
+def refresh_course_revenue(db: Session, course_ids: Iterable[int]):
+    """Recomputes the rollup rows of the given courses from their current state.
+
+    Costs five statements regardless of how many courses are passed; the caller commits.
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return
+    courses = db.query(
+        models.Course.id, models.Course.teacher_id, models.Course.level,
+        models.Course.price, models.Course.start_date, models.Course.end_date
+    ).filter(models.Course.id.in_(course_ids)).all()
+    paid = paid_counts(db, course_ids)
+    db.execute(delete(models.RevenueRollup).where(models.RevenueRollup.course_id.in_(course_ids)))
+    rows = [
+        {
+            "course_id": course.id,
+            "teacher_id": course.teacher_id,
+            "level": course.level,
+            "month": month,
+            "share": share,
+            "paid_enrollments": paid.get(course.id, 0),
+        }
+        for course in courses
+        for month, share in month_shares(course.price, course.start_date, course.end_date)
+    ]
+    if rows:
+        db.execute(insert(models.RevenueRollup), rows)
+
+def adjust_paid_enrollments(db: Session, course_id: int, delta: int):
+    """Applies a change in a course's number of paid enrollments to its rollup rows."""
+    if delta:
+        db.execute(
+            update(models.RevenueRollup)
+            .where(models.RevenueRollup.course_id == course_id)
+            .values(paid_enrollments=models.RevenueRollup.paid_enrollments + delta)
+        )
+
+def paid_enrollments_removed(enrollment_filter, model=models.CourseEnrollment):
+    """Builds an UPDATE subtracting the paid rows of `model` matched by `enrollment_filter`.
+
+    Must run before those enrollments are deleted, in the same transaction.
+    """
+    removed = select(func.count(model.id)).where(
+        model.course_id == models.RevenueRollup.course_id,
+        model.payment_status == PAID,
+        enrollment_filter,
+    ).scalar_subquery()
+    affected = select(model.course_id).where(
+        model.payment_status == PAID, enrollment_filter
+    )
+    return update(models.RevenueRollup)\
+        .where(models.RevenueRollup.course_id.in_(affected))\
+        .values(paid_enrollments=models.RevenueRollup.paid_enrollments - removed)
+
+def rebuild_revenue(db: Session, on_chunk: Optional[Callable[[int, int], None]] = None) -> dict:
+    """Recomputes every course's rollup rows, one short transaction per chunk of courses."""
+    course_ids = [course_id for (course_id,) in db.query(models.Course.id).order_by(models.Course.id)]
+    # Rows of courses that no longer exist are not reached by the per-course refresh
+    db.execute(delete(models.RevenueRollup).where(models.RevenueRollup.course_id.not_in(
+        select(models.Course.id)
+    )))
+    db.commit()
+    processed = 0
+    for chunk in chunked(course_ids, BULK_CHUNK_SIZE):
+        refresh_course_revenue(db, chunk)
+        db.commit()
+        processed += len(chunk)
+        if on_chunk:
+            on_chunk(processed, len(course_ids))
+    return {"courses": len(course_ids)}
+
+@runner.register("revenue.rebuild", max_concurrency=1)
+def rebuild_revenue_job(ctx, params):
+    with SessionLocal() as db:
+        return rebuild_revenue(db, on_chunk=ctx.progress)
+
+GROUP_COLUMNS = {
+    "month": models.RevenueRollup.month,
+    "course": models.RevenueRollup.course_id,
+    "teacher": models.RevenueRollup.teacher_id,
+    "level": models.RevenueRollup.level,
+}
+
+def revenue_report(db: Session, start: date, end: date, group_by: str) -> List[dict]:
+    """Sums recognised revenue between the months of `start` and `end` (inclusive)."""
+    column = GROUP_COLUMNS[group_by]
+    revenue = func.sum(models.RevenueRollup.share * models.RevenueRollup.paid_enrollments)
+    rows = db.query(column, revenue)\
+        .filter(models.RevenueRollup.month >= month_start(start), models.RevenueRollup.month <= month_start(end))\
+        .group_by(column)\
+        .order_by(column)\
+        .all()
+    return [
+        {"key": key.strftime("%Y-%m") if group_by == "month" else key, "revenue": round(amount or 0.0, 2)}
+        for key, amount in rows
+    ]
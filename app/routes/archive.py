@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from .. import models, schemas
+from ..database import get_db, get_read_db
+from ..jobs import runner
+from ..archive import restore_students, restore_enrollments
+
+router = APIRouter()
+
+
+# Archive endpoints (No Admin Restriction)
+@router.post("/archive/run", response_model=schemas.Job, status_code=202, tags=["Archive"])
+async def run_archive(chunk_size: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db)):
+    """Queues moving inactive students and enrollments of long-finished courses to the archive tables."""
+    return runner.enqueue(db, "archive.run", {"chunk_size": chunk_size})
+
+@router.get("/archive/stats", tags=["Archive"])
+async def archive_stats(db: Session = Depends(get_read_db)):
+    return {
+        "students": db.query(models.Student).count(),
+        "archived_students": db.query(models.ArchivedStudent).count(),
+        "enrollments": db.query(models.CourseEnrollment).count(),
+        "archived_enrollments": db.query(models.ArchivedEnrollment).count(),
+    }
+
+@router.post("/archive/students/restore", tags=["Archive"])
+async def restore_archived_students(student_ids: List[int], chunk_size: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db)):
+    """Moves students back to the hot tables together with their archived enrollments."""
+    return restore_students(db, student_ids, chunk_size)
+
+@router.post("/archive/enrollments/restore", tags=["Archive"])
+async def restore_archived_enrollments(enrollment_ids: List[int], chunk_size: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db)):
+    return restore_enrollments(db, enrollment_ids, chunk_size)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from .. import models, schemas
+from ..database import get_read_db
+
+router = APIRouter()
+
+
+# Audit trail endpoints
+@router.get("/audit/", response_model=List[schemas.AuditEvent], tags=["Audit"])
+async def list_audit_events(
+    entity: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    action: Optional[str] = None,
+    actor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    """Newest first; events reach this list within AUDIT_FLUSH_SECONDS of the change."""
+    query = db.query(models.AuditEvent)
+    if entity:
+        query = query.filter(models.AuditEvent.entity == entity)
+    if entity_id is not None:
+        query = query.filter(models.AuditEvent.entity_id == entity_id)
+    if action:
+        query = query.filter(models.AuditEvent.action == action)
+    if actor:
+        query = query.filter(models.AuditEvent.actor == actor)
+    return query.order_by(models.AuditEvent.id.desc()).offset(skip).limit(limit).all()
@@ -1,84 +1,189 @@
-from fastapi import APIRouter, Depends, HTTPException  
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import func, delete
+from typing import List, Optional
 from datetime import datetime
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_db, get_read_db, SessionLocal
+from ..bulk import execute_in_chunks, existing_ids
+from ..jobs import runner
+from ..revenue import refresh_course_revenue
+from ..includes import parse_include, with_includes
+from ..cache import cached_response
+from ..audit import AuditContext, audit_context, audit_log
+from ..counts import table_count
+from ..sync import changes_since
+from ..queries import get_by_id, course_students
+from ..schedule import check_schedule
 
 router = APIRouter()
 
+COURSE_INCLUDES = {"teacher", "enrollments", "enrollment_count"}
+# Tables read by the course list and roster, whose writes invalidate their cached responses
+COURSE_LIST_TABLES = ("courses", "teachers", "course_enrollments")
+COURSE_STUDENTS_TABLES = ("courses", "students", "course_enrollments")
+
+# Dependents first: each chunk runs these in order within one transaction
+COURSE_DELETE_STATEMENTS = {
+    "revenue_rows_deleted": lambda chunk: delete(models.RevenueRollup)
+        .where(models.RevenueRollup.course_id.in_(chunk)),
+    "enrollments_deleted": lambda chunk: delete(models.CourseEnrollment)
+        .where(models.CourseEnrollment.course_id.in_(chunk)),
+    "archived_enrollments_deleted": lambda chunk: delete(models.ArchivedEnrollment)
+        .where(models.ArchivedEnrollment.course_id.in_(chunk)),
+    "waitlist_entries_deleted": lambda chunk: delete(models.WaitlistEntry)
+        .where(models.WaitlistEntry.course_id.in_(chunk)),
+    "deleted": lambda chunk: delete(models.Course).where(models.Course.id.in_(chunk)),
+}
 
 
 # Course endpoints (No Admin Restriction)
 @router.post("/courses/", response_model=schemas.Course, tags=["Courses"])
 async def create_course(course: schemas.CourseCreate, db: Session = Depends(get_db), tags=["Courses"]):
+    check_schedule(db, course.teacher_id, course.start_date, course.end_date)
     db_course = models.Course(**course.dict())
     db.add(db_course)
+    db.flush()
+    refresh_course_revenue(db, [db_course.id])
     db.commit()
     db.refresh(db_course)
     return db_course
 
-@router.get("/courses/", response_model=List[schemas.Course], tags=["Courses"])
-async def list_courses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Course).offset(skip).limit(limit).all()
+def query_courses(db: Session, skip: int, limit: int, includes: set):
+    query = db.query(models.Course)
+    if "teacher" in includes:
+        query = query.options(joinedload(models.Course.teacher))
+    if "enrollments" in includes:
+        query = query.options(selectinload(models.Course.enrollments))
+    if "enrollment_count" in includes:
+        counts = db.query(
+            models.CourseEnrollment.course_id,
+            func.count(models.CourseEnrollment.id).label("enrollment_count")
+        ).group_by(models.CourseEnrollment.course_id).subquery()
+        query = query.outerjoin(counts, counts.c.course_id == models.Course.id)\
+            .add_columns(func.coalesce(counts.c.enrollment_count, 0))
+        rows = query.offset(skip).limit(limit).all()
+        return [with_includes(course, includes, enrollment_count=count) for course, count in rows]
+    return [with_includes(course, includes) for course in query.offset(skip).limit(limit).all()]
+
+@router.get("/courses/", response_model=List[schemas.CourseDetail], response_model_exclude_unset=True, tags=["Courses"])
+async def list_courses(request: Request, skip: int = 0, limit: int = 100, include: Optional[str] = None, exact: bool = True, db: Session = Depends(get_read_db)):
+    """Lists courses; ?include=teacher,enrollments,enrollment_count adds related data in a fixed number of queries."""
+    includes = parse_include(include, COURSE_INCLUDES)
+    response = cached_response(
+        request, db, COURSE_LIST_TABLES, List[schemas.CourseDetail],
+        lambda: query_courses(db, skip, limit, includes), exclude_unset=True
+    )
+    response.headers["X-Total-Count"] = str(table_count(db, models.Course, exact))
+    return response
+
+@router.get("/courses/changes", response_model=schemas.Changes[schemas.Course], tags=["Courses"])
+async def course_changes(since: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Courses created, updated or deleted since the `since` token; pass the returned token next time."""
+    return changes_since(db, models.Course, since)
 
 @router.put("/courses/bulk-activate", tags=["Courses"])
-async def bulk_activate_courses(course_ids: List[int], db: Session = Depends(get_db)):
+async def bulk_activate_courses(course_ids: List[int], db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    updated = existing_ids(db, models.Course, course_ids)
     db.query(models.Course).filter(models.Course.id.in_(course_ids)).update({models.Course.active: True})
     db.commit()
+    audit_log.record(audit, "activate", "courses", updated)
     return {"message": f"{len(course_ids)} courses activated successfully"}
 
 @router.put("/courses/bulk-deactivate", tags=["Courses"])
-async def bulk_deactivate_courses(course_ids: List[int], db: Session = Depends(get_db)):
+async def bulk_deactivate_courses(course_ids: List[int], db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    updated = existing_ids(db, models.Course, course_ids)
     db.query(models.Course).filter(models.Course.id.in_(course_ids)).update({models.Course.active: False})
     db.commit()
+    audit_log.record(audit, "deactivate", "courses", updated)
     return {"message": f"{len(course_ids)} courses deactivated successfully"}
 
 @router.delete("/courses/bulk-delete", tags=["Courses"])
-async def bulk_delete_courses(course_ids: List[int], db: Session = Depends(get_db)):
-    db.query(models.Course).filter(models.Course.id.in_(course_ids)).delete(synchronize_session=False)
-    db.commit()
-    return {"message": f"{len(course_ids)} courses deleted successfully"}
+async def bulk_delete_courses(course_ids: List[int], chunk_size: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    deleted = existing_ids(db, models.Course, course_ids, chunk_size)
+    totals = execute_in_chunks(
+        db, course_ids, COURSE_DELETE_STATEMENTS, chunk_size,
+        on_commit=audit_log.chunk_recorder(audit, "delete", "courses", deleted)
+    )
+    return {"message": f"{totals['deleted']} courses deleted successfully", **totals}
 
-@router.get("/courses/{course_id}/students", response_model=List[schemas.Student], tags=["Courses"])
-async def get_course_students(course_id: int, db: Session = Depends(get_db)):
+def query_course_students(db: Session, course_id: int):
     # Check if course exists
-    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+    course = get_by_id(db, models.Course, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
     # Get all enrollments for this course and join with students
-    students = db.query(models.Student)\
-        .join(models.CourseEnrollment, models.Student.id == models.CourseEnrollment.student_id)\
-        .filter(models.CourseEnrollment.course_id == course_id)\
-        .all()
-    
-    return students
+    return course_students(db, course_id)
+
+@router.get("/courses/{course_id}/students", response_model=List[schemas.Student], tags=["Courses"])
+async def get_course_students(request: Request, course_id: int, db: Session = Depends(get_read_db)):
+    return cached_response(
+        request, db, COURSE_STUDENTS_TABLES, List[schemas.Student],
+        lambda: query_course_students(db, course_id)
+    )
+
+@router.put("/courses/{course_id}", response_model=schemas.Course, tags=["Courses"])
+async def update_course(course_id: int, course: schemas.CourseUpdate, db: Session = Depends(get_db)):
+    """Updates the given fields; a new teacher or new dates are checked against the teacher's other courses."""
+    db_course = get_by_id(db, models.Course, course_id)
+    if not db_course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    changes = course.dict(exclude_unset=True)
+    if {"teacher_id", "start_date", "end_date"} & changes.keys():
+        check_schedule(
+            db,
+            changes.get("teacher_id", db_course.teacher_id),
+            changes.get("start_date", db_course.start_date),
+            changes.get("end_date", db_course.end_date),
+            course_id,
+        )
+    for field, value in changes.items():
+        setattr(db_course, field, value)
+    db.flush()
+    refresh_course_revenue(db, [course_id])
+    db.commit()
+    db.refresh(db_course)
+    return db_course
 
 @router.delete("/courses/{course_id}", tags=["Courses"])
-async def delete_course(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+async def delete_course(course_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    course = get_by_id(db, models.Course, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
+    db.query(models.RevenueRollup).filter(models.RevenueRollup.course_id == course_id).delete(synchronize_session=False)
+    db.query(models.WaitlistEntry).filter(models.WaitlistEntry.course_id == course_id).delete(synchronize_session=False)
     db.delete(course)
     db.commit()
+    audit_log.record(audit, "delete", "courses", [course_id])
     return {"message": "Course deleted successfully"}
 
 @router.put("/courses/{course_id}/activate", tags=["Courses"])
-async def activate_course(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+async def activate_course(course_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    course = get_by_id(db, models.Course, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     course.active = True
     db.commit()
+    audit_log.record(audit, "activate", "courses", [course_id])
     return {"message": "Course activated successfully"}
 
 @router.put("/courses/{course_id}/deactivate", tags=["Courses"])
-async def deactivate_course(course_id: int, db: Session = Depends(get_db)):
-    course = db.query(models.Course).filter(models.Course.id == course_id).first()
+async def deactivate_course(course_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    course = get_by_id(db, models.Course, course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     course.active = False
     db.commit()
-    return {"message": "Course deactivated successfully"}
\ No newline at end of file
+    audit_log.record(audit, "deactivate", "courses", [course_id])
+    return {"message": "Course deactivated successfully"}
+
+@runner.register("courses.bulk_delete", max_concurrency=1, params=schemas.CourseBulkDeleteParams)
+def bulk_delete_courses_job(ctx, params):
+    with SessionLocal() as db:
+        deleted = existing_ids(db, models.Course, params["course_ids"], params.get("chunk_size"))
+        totals = execute_in_chunks(
+            db, params["course_ids"], COURSE_DELETE_STATEMENTS, params.get("chunk_size"), on_chunk=ctx.progress,
+            on_commit=audit_log.chunk_recorder(AuditContext(None, f"job {ctx.job_id}"), "delete", "courses", deleted)
+        )
+    return totals
@@ -1,35 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException  
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import List
-from datetime import datetime
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_read_db
+from ..cache import cached_response, VERSIONED_TABLES
+from ..dashboard import current_month, dashboard_stats
+from ..events import broker
 
 router = APIRouter()
 
 # Dashboard Statistics (No Admin Restriction)
 @router.get("/dashboard/stats/", response_model=schemas.DashboardStats, tags=["Dashboard"])
-async def get_dashboard_stats(db: Session = Depends(get_db)):
-    total_students = db.query(func.count(models.Student.id)).scalar()
-    total_teachers = db.query(func.count(models.Teacher.id)).scalar()
-    total_courses = db.query(func.count(models.Course.id)).scalar()
-    active_enrollments = db.query(func.count(models.CourseEnrollment.id))\
-        .filter(models.CourseEnrollment.payment_status == "Paid").scalar()
-    
-    # Calculate revenue for current month
-    current_month = datetime.utcnow().replace(day=1)
-    revenue = db.query(func.sum(models.Course.price))\
-        .join(models.CourseEnrollment)\
-        .filter(
-            models.CourseEnrollment.payment_status == "Paid",
-            models.CourseEnrollment.enrollment_date >= current_month
-        ).scalar() or 0.0
+async def get_dashboard_stats(request: Request, db: Session = Depends(get_read_db)):
+    month = current_month()
+    # The month is part of the key so the revenue figure rolls over without a write
+    return cached_response(
+        request, db, VERSIONED_TABLES, schemas.DashboardStats,
+        lambda: dashboard_stats(db, month), vary=(month,)
+    )
 
-    return {
-        "total_students": total_students,
-        "total_teachers": total_teachers,
-        "total_courses": total_courses,
-        "active_enrollments": active_enrollments,
-        "revenue_this_month": revenue
-    }
\ No newline at end of file
+@router.get("/dashboard/stream", tags=["Dashboard"])
+async def stream_dashboard(request: Request):
+    """Server-Sent Events: `stats` whenever the dashboard figures change and `enrollment` for each new enrollment."""
+    if broker.full:
+        raise HTTPException(status_code=503, detail="Too many dashboard subscribers", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        broker.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
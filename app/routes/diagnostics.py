@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from typing import List, Literal
+from .. import schemas
+from ..slow_queries import slow_query_log
+
+router = APIRouter()
+
+
+# Diagnostics endpoints
+@router.get("/diagnostics/slow-queries", response_model=List[schemas.SlowQuery], tags=["Diagnostics"])
+async def list_slow_queries(limit: int = 20, order_by: Literal["total_ms", "count", "max_ms"] = "total_ms"):
+    """Statements slower than SLOW_QUERY_MS seen by this worker, most total time first."""
+    return slow_query_log.top(limit, order_by)
+
+@router.delete("/diagnostics/slow-queries", tags=["Diagnostics"])
+async def reset_slow_queries():
+    slow_query_log.reset()
+    return {"message": "Slow query statistics reset"}
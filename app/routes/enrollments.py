@@ -1,35 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException  
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, insert
+from typing import List, Optional
 from datetime import datetime
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_db, get_read_db
+from ..includes import parse_include, with_includes
+from ..revenue import PAID, adjust_paid_enrollments
+from ..cache import cached_response
+from ..counts import table_count
+from ..sync import changes_since
+from ..queries import get_by_id, course_enrollment_count
+from ..archive import with_archived
+from ..enrollment_queue import ENROLLMENT_QUEUE_ENABLED, enrollment_queue, promote_waitlist, waitlist
 
 router = APIRouter()
 
+ENROLLMENT_INCLUDES = {"student", "course"}
+# Tables read by the enrollment list, whose writes invalidate its cached responses
+ENROLLMENT_LIST_TABLES = ("course_enrollments", "students", "courses")
+
 
 # Enrollment endpoints (No Admin Restriction)
-@router.post("/enrollments/", response_model=schemas.Enrollment, tags=["Enrollments"])
+@router.post("/enrollments/", response_model=schemas.Enrollment, responses={202: {"model": schemas.WaitlistEntry}}, tags=["Enrollments"])
 async def create_enrollment(enrollment: schemas.EnrollmentCreate, db: Session = Depends(get_db)):
+    """Enrolls a student. With ENROLLMENT_QUEUE=true, requests are committed in per-course
+    batches and a full course puts the student on its waitlist (202) instead of failing."""
+    if ENROLLMENT_QUEUE_ENABLED:
+        result = await enrollment_queue.submit(enrollment)
+        if isinstance(result, schemas.WaitlistEntry):
+            return JSONResponse(result.model_dump(mode="json"), status_code=202)
+        return result
+
     # Check if course exists
-    course = db.query(models.Course).filter(models.Course.id == enrollment.course_id).first()
+    course = get_by_id(db, models.Course, enrollment.course_id)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     
     # Check if course is full
-    current_enrollments = db.query(func.count(models.CourseEnrollment.id))\
-        .filter(models.CourseEnrollment.course_id == enrollment.course_id).scalar()
+    current_enrollments = course_enrollment_count(db, enrollment.course_id)
     
     if current_enrollments >= course.max_students:
         raise HTTPException(status_code=400, detail="Course is full")
     
     db_enrollment = models.CourseEnrollment(**enrollment.dict())
     db.add(db_enrollment)
+    if enrollment.payment_status == PAID:
+        adjust_paid_enrollments(db, enrollment.course_id, 1)
     db.commit()
     db.refresh(db_enrollment)
     return db_enrollment
 
-@router.get("/enrollments/", response_model=List[schemas.Enrollment], tags=["Enrollments"])
-async def list_enrollments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), tags=["Enrollments"]):
-    return db.query(models.CourseEnrollment).offset(skip).limit(limit).all()
+def query_enrollments(db: Session, skip: int, limit: int, includes: set):
+    query = db.query(models.CourseEnrollment)
+    if "student" in includes:
+        query = query.options(joinedload(models.CourseEnrollment.student))
+    if "course" in includes:
+        query = query.options(joinedload(models.CourseEnrollment.course))
+    return [with_includes(enrollment, includes) for enrollment in query.offset(skip).limit(limit).all()]
+
+@router.get("/enrollments/", response_model=List[schemas.EnrollmentDetail], response_model_exclude_unset=True, tags=["Enrollments"])
+async def list_enrollments(request: Request, skip: int = 0, limit: int = 100, include: Optional[str] = None, include_archived: bool = False, exact: bool = True, db: Session = Depends(get_read_db), tags=["Enrollments"]):
+    """Lists enrollments; ?include=student,course joins the related rows into the same query.
+
+    ?include_archived=true also lists archived enrollments, flagged with `archived`.
+    """
+    includes = parse_include(include, ENROLLMENT_INCLUDES)
+    if include_archived and includes:
+        raise HTTPException(status_code=400, detail="include cannot be combined with include_archived")
+    build = (lambda: with_archived(db, models.CourseEnrollment, models.ArchivedEnrollment, skip, limit)) if include_archived \
+        else (lambda: query_enrollments(db, skip, limit, includes))
+    response = cached_response(request, db, ENROLLMENT_LIST_TABLES, List[schemas.EnrollmentDetail], build, exclude_unset=True)
+    total = table_count(db, models.CourseEnrollment, exact)
+    if include_archived:
+        total += table_count(db, models.ArchivedEnrollment, exact)
+    response.headers["X-Total-Count"] = str(total)
+    return response
+
+@router.get("/enrollments/changes", response_model=schemas.Changes[schemas.Enrollment], tags=["Enrollments"])
+async def enrollment_changes(since: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Enrollments created, updated or deleted since the `since` token; pass the returned token next time."""
+    return changes_since(db, models.CourseEnrollment, since)
+
+@router.put("/enrollments/{enrollment_id}/payment", response_model=schemas.Enrollment, tags=["Enrollments"])
+async def update_payment_status(enrollment_id: int, payment: schemas.PaymentStatusUpdate, db: Session = Depends(get_db)):
+    enrollment = get_by_id(db, models.CourseEnrollment, enrollment_id)
+    if not enrollment:
+        raise HTTPException(status_code=404, detail="Enrollment not found")
+    delta = (payment.payment_status == PAID) - (enrollment.payment_status == PAID)
+    enrollment.payment_status = payment.payment_status
+    adjust_paid_enrollments(db, enrollment.course_id, delta)
+    db.commit()
+    db.refresh(enrollment)
+    return enrollment
+
+@router.get("/courses/{course_id}/waitlist", response_model=List[schemas.WaitlistEntry], tags=["Enrollments"])
+async def get_course_waitlist(course_id: int, db: Session = Depends(get_read_db)):
+    return waitlist(db, course_id)
+
+@router.post("/courses/{course_id}/waitlist/promote", response_model=schemas.WaitlistPromotion, tags=["Enrollments"])
+async def promote_course_waitlist(course_id: int, db: Session = Depends(get_db)):
+    """Enrolls students from the head of the waitlist into the course's free places."""
+    return promote_waitlist(db, course_id)
+
+@router.post("/courses/{course_id}/enrollments/bulk", response_model=schemas.BulkEnrollmentResult, tags=["Enrollments"])
+async def bulk_create_enrollments(course_id: int, payload: schemas.BulkEnrollmentCreate, db: Session = Depends(get_db)):
+    """Enrolls a group of students into one course in a single transaction.
+
+    Unknown students and students already in the course are skipped and reported; the
+    remaining students are inserted with one statement after a single capacity check.
+    """
+    # Lock the course row so concurrent batches cannot both pass the capacity check
+    course = db.query(models.Course).filter(models.Course.id == course_id).with_for_update().first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    requested = list(dict.fromkeys(payload.student_ids))
+    known = {
+        student_id for (student_id,) in db.query(models.Student.id)
+        .filter(models.Student.id.in_(requested))
+    }
+    enrolled = {
+        student_id for (student_id,) in db.query(models.CourseEnrollment.student_id)
+        .filter(models.CourseEnrollment.course_id == course_id, models.CourseEnrollment.student_id.in_(requested))
+    }
+    to_enroll = [student_id for student_id in requested if student_id in known and student_id not in enrolled]
+
+    current_enrollments = db.query(func.count(models.CourseEnrollment.id))\
+        .filter(models.CourseEnrollment.course_id == course_id).scalar()
+    if current_enrollments + len(to_enroll) > course.max_students:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Course is full: {course.max_students - current_enrollments} places left, {len(to_enroll)} requested"
+        )
+
+    if to_enroll:
+        now = datetime.utcnow()
+        db.execute(insert(models.CourseEnrollment).values([
+            {"student_id": student_id, "course_id": course_id, "enrollment_date": now, "payment_status": payload.payment_status}
+            for student_id in to_enroll
+        ]))
+        if payload.payment_status == PAID:
+            adjust_paid_enrollments(db, course_id, len(to_enroll))
+    db.commit()
+
+    return {
+        "course_id": course_id,
+        "enrolled": to_enroll,
+        "already_enrolled": [student_id for student_id in requested if student_id in enrolled],
+        "unknown_students": [student_id for student_id in requested if student_id not in known],
+    }
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from .. import models, schemas
+from ..database import get_db
+from ..jobs import runner
+from ..counts import filtered_count
+from ..queries import get_by_id
+
+router = APIRouter()
+
+
+# Background job endpoints
+@router.post("/jobs/", response_model=schemas.Job, status_code=202, tags=["Jobs"])
+async def create_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
+    """Queues a long-running operation; poll GET /jobs/{job_id} for its progress."""
+    return runner.enqueue(db, job.job_type, job.params)
+
+@router.get("/jobs/types", tags=["Jobs"])
+async def list_job_types():
+    return {job_type: {"max_concurrency": runner.limits[job_type]} for job_type in sorted(runner.handlers)}
+
+@router.get("/jobs/", response_model=List[schemas.Job], tags=["Jobs"])
+async def list_jobs(
+    response: Response,
+    status: Optional[str] = None,
+    job_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    query = db.query(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if job_type:
+        query = query.filter(models.Job.job_type == job_type)
+    response.headers["X-Total-Count"] = str(filtered_count(("jobs", status, job_type), query))
+    return query.order_by(models.Job.id.desc()).offset(skip).limit(limit).all()
+
+@router.get("/jobs/{job_id}", response_model=schemas.Job, tags=["Jobs"])
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = get_by_id(db, models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel", response_model=schemas.Job, tags=["Jobs"])
+async def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    job = get_by_id(db, models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return runner.cancel(db, job)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Literal
+from datetime import date
+from .. import schemas
+from ..database import get_db, get_read_db, read_only
+from ..jobs import runner
+from ..revenue import revenue_report
+
+router = APIRouter()
+
+
+# Report endpoints (No Admin Restriction)
+@router.get("/reports/revenue", response_model=List[schemas.RevenueBucket], tags=["Reports"])
+async def get_revenue_report(
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    group_by: Literal["month", "course", "teacher", "level"] = "month",
+    db: Session = Depends(get_read_db)
+):
+    """Revenue recognised between the months of `from` and `to`, pro-rated over each course's dates.
+
+    Served from the revenue_rollups table, so the cost depends on the number of
+    course-months in range rather than on enrollment history.
+    """
+    return revenue_report(db, start, end, group_by)
+
+@router.post("/reports/revenue/projections", response_model=schemas.ProjectionResult, tags=["Reports"])
+@read_only
+def project_revenue_scenarios(request: schemas.ProjectionRequest, db: Session = Depends(get_read_db)):
+    """Projects monthly revenue for a batch of what-if enrollment and pricing scenarios.
+
+    Courses are loaded once into arrays and all scenarios are evaluated together with
+    vectorized NumPy operations.
+    """
+    if request.end < request.start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    # Imported here so NumPy is only loaded by workers that actually serve projections
+    from ..projections import project_revenue
+    return project_revenue(db, request)
+
+@router.post("/reports/revenue/rebuild", response_model=schemas.Job, status_code=202, tags=["Reports"])
+async def rebuild_revenue_rollups(db: Session = Depends(get_db)):
+    """Queues a full recomputation of the revenue rollups from courses and enrollments."""
+    return runner.enqueue(db, "revenue.rebuild")
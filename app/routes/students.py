@@ -1,13 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException  
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, delete
+from typing import List, Optional
 from datetime import datetime
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_db, get_read_db, SessionLocal
+from ..bulk import execute_in_chunks, existing_ids
+from ..jobs import runner
+from ..revenue import paid_enrollments_removed
+from ..includes import parse_include, with_includes
+from ..imports import import_students, report_path
+from ..cache import cached_response
+from ..audit import AuditContext, audit_context, audit_log
+from ..counts import table_count
+from ..sync import changes_since
+from ..queries import get_by_id
+from ..archive import with_archived
 
 router = APIRouter()
 
+STUDENT_INCLUDES = {"enrollments", "enrollment_count"}
+# Tables read by the student list, whose writes invalidate its cached responses
+STUDENT_LIST_TABLES = ("students", "course_enrollments")
+
+# Dependents first: each chunk runs these in order within one transaction
+STUDENT_DELETE_STATEMENTS = {
+    "revenue_rows_adjusted": lambda chunk: paid_enrollments_removed(models.CourseEnrollment.student_id.in_(chunk)),
+    "enrollments_deleted": lambda chunk: delete(models.CourseEnrollment)
+        .where(models.CourseEnrollment.student_id.in_(chunk)),
+    "archived_revenue_rows_adjusted": lambda chunk: paid_enrollments_removed(
+        models.ArchivedEnrollment.student_id.in_(chunk), models.ArchivedEnrollment
+    ),
+    "archived_enrollments_deleted": lambda chunk: delete(models.ArchivedEnrollment)
+        .where(models.ArchivedEnrollment.student_id.in_(chunk)),
+    "waitlist_entries_deleted": lambda chunk: delete(models.WaitlistEntry)
+        .where(models.WaitlistEntry.student_id.in_(chunk)),
+    "deleted": lambda chunk: delete(models.Student).where(models.Student.id.in_(chunk)),
+}
+
 
 # Student endpoints (No Admin Restriction)
 @router.post("/students/", response_model=schemas.Student, tags=["Students"])
@@ -18,51 +49,135 @@ async def create_student(student: schemas.StudentCreate, db: Session = Depends(g
     db.refresh(db_student)
     return db_student
 
-@router.get("/students/", response_model=List[schemas.Student], tags=["Students"])
-async def list_students(skip: int = 0, limit: int = 3000, db: Session = Depends(get_db)):
-    return db.query(models.Student).offset(skip).limit(limit).all()
+def query_students(db: Session, skip: int, limit: int, includes: set):
+    query = db.query(models.Student)
+    if "enrollments" in includes:
+        query = query.options(selectinload(models.Student.enrollments))
+    if "enrollment_count" in includes:
+        counts = db.query(
+            models.CourseEnrollment.student_id,
+            func.count(models.CourseEnrollment.id).label("enrollment_count")
+        ).group_by(models.CourseEnrollment.student_id).subquery()
+        query = query.outerjoin(counts, counts.c.student_id == models.Student.id)\
+            .add_columns(func.coalesce(counts.c.enrollment_count, 0))
+        rows = query.offset(skip).limit(limit).all()
+        return [with_includes(student, includes, enrollment_count=count) for student, count in rows]
+    return [with_includes(student, includes) for student in query.offset(skip).limit(limit).all()]
+
+@router.get("/students/", response_model=List[schemas.StudentDetail], response_model_exclude_unset=True, tags=["Students"])
+async def list_students(
+    request: Request,
+    skip: int = 0,
+    limit: int = 3000,
+    include: Optional[str] = None,
+    include_archived: bool = False,
+    exact: bool = True,
+    db: Session = Depends(get_read_db)
+):
+    """Lists students; ?include=enrollments,enrollment_count adds related data in a fixed number of queries.
+
+    ?include_archived=true also lists archived students, flagged with `archived`.
+    """
+    includes = parse_include(include, STUDENT_INCLUDES)
+    if include_archived and includes:
+        raise HTTPException(status_code=400, detail="include cannot be combined with include_archived")
+    build = (lambda: with_archived(db, models.Student, models.ArchivedStudent, skip, limit)) if include_archived \
+        else (lambda: query_students(db, skip, limit, includes))
+    response = cached_response(request, db, STUDENT_LIST_TABLES, List[schemas.StudentDetail], build, exclude_unset=True)
+    # Lets clients paginate without fetching every row just to count them
+    total = table_count(db, models.Student, exact)
+    if include_archived:
+        total += table_count(db, models.ArchivedStudent, exact)
+    response.headers["X-Total-Count"] = str(total)
+    return response
+
+@router.get("/students/changes", response_model=schemas.Changes[schemas.Student], tags=["Students"])
+async def student_changes(since: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Students created, updated or deleted since the `since` token; pass the returned token next time."""
+    return changes_since(db, models.Student, since)
+
+@router.post("/students/import", response_model=schemas.StudentImportResult, tags=["Students"])
+def import_students_csv(
+    file: UploadFile = File(...),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """Imports students from a CSV with first_name,last_name,email,phone,level columns.
+
+    Rows that fail validation or reuse an existing email are skipped and listed in a
+    report downloadable from /students/import/{report_id}/errors.
+    """
+    return import_students(db, file.file, batch_size)
+
+@router.get("/students/import/{report_id}/errors", tags=["Students"])
+async def download_import_errors(report_id: str):
+    path = report_path(report_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Import report not found")
+    return FileResponse(path, media_type="text/csv", filename=f"student-import-{report_id}.csv")
 
 @router.put("/students/bulk-activate", tags=["Students"])
-async def bulk_activate_students(student_ids: List[int], db: Session = Depends(get_db)):
+async def bulk_activate_students(student_ids: List[int], db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    updated = existing_ids(db, models.Student, student_ids)
     db.query(models.Student).filter(models.Student.id.in_(student_ids)).update({models.Student.active: True})
     db.commit()
+    audit_log.record(audit, "activate", "students", updated)
     return {"message": f"{len(student_ids)} students activated successfully"}
 
 @router.put("/students/bulk-deactivate", tags=["Students"])
-async def bulk_deactivate_students(student_ids: List[int], db: Session = Depends(get_db)):
+async def bulk_deactivate_students(student_ids: List[int], db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    updated = existing_ids(db, models.Student, student_ids)
     db.query(models.Student).filter(models.Student.id.in_(student_ids)).update({models.Student.active: False})
     db.commit()
+    audit_log.record(audit, "deactivate", "students", updated)
     return {"message": f"{len(student_ids)} students deactivated successfully"}
 
 @router.delete("/students/bulk-delete", tags=["Students"])
-async def bulk_delete_students(student_ids: List[int], db: Session = Depends(get_db)):
-    db.query(models.Student).filter(models.Student.id.in_(student_ids)).delete(synchronize_session=False)
-    db.commit()
-    return {"message": f"{len(student_ids)} students deleted successfully"}
+async def bulk_delete_students(student_ids: List[int], chunk_size: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    deleted = existing_ids(db, models.Student, student_ids, chunk_size)
+    totals = execute_in_chunks(
+        db, student_ids, STUDENT_DELETE_STATEMENTS, chunk_size,
+        on_commit=audit_log.chunk_recorder(audit, "delete", "students", deleted)
+    )
+    return {"message": f"{totals['deleted']} students deleted successfully", **totals}
 
 @router.delete("/students/{student_id}", tags=["Students"])
-async def delete_student(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+async def delete_student(student_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    student = get_by_id(db, models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
+    db.query(models.WaitlistEntry).filter(models.WaitlistEntry.student_id == student_id).delete(synchronize_session=False)
     db.delete(student)
     db.commit()
+    audit_log.record(audit, "delete", "students", [student_id])
     return {"message": "Student deleted successfully"}
 
 @router.put("/students/{student_id}/activate", tags=["Students"])
-async def activate_student(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+async def activate_student(student_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    student = get_by_id(db, models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     student.active = True
     db.commit()
+    audit_log.record(audit, "activate", "students", [student_id])
     return {"message": "Student activated successfully"}
 
 @router.put("/students/{student_id}/deactivate", tags=["Students"])
-async def deactivate_student(student_id: int, db: Session = Depends(get_db)):
-    student = db.query(models.Student).filter(models.Student.id == student_id).first()
+async def deactivate_student(student_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    student = get_by_id(db, models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     student.active = False
     db.commit()
-    return {"message": "Student deactivated successfully"}
\ No newline at end of file
+    audit_log.record(audit, "deactivate", "students", [student_id])
+    return {"message": "Student deactivated successfully"}
+
+@runner.register("students.bulk_delete", max_concurrency=1, params=schemas.StudentBulkDeleteParams)
+def bulk_delete_students_job(ctx, params):
+    with SessionLocal() as db:
+        deleted = existing_ids(db, models.Student, params["student_ids"], params.get("chunk_size"))
+        totals = execute_in_chunks(
+            db, params["student_ids"], STUDENT_DELETE_STATEMENTS, params.get("chunk_size"), on_chunk=ctx.progress,
+            on_commit=audit_log.chunk_recorder(AuditContext(None, f"job {ctx.job_id}"), "delete", "students", deleted)
+        )
+    return totals
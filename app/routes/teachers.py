@@ -1,13 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException  
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, delete, update
+from typing import List, Optional
 from datetime import datetime
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_db, get_read_db, SessionLocal
+from ..bulk import execute_in_chunks, existing_ids
+from ..jobs import runner
+from ..includes import parse_include, with_includes
+from ..cache import cached_response
+from ..audit import AuditContext, audit_context, audit_log
+from ..counts import table_count
+from ..sync import changes_since
+from ..queries import get_by_id
+from ..schedule import naive_utc, teacher_availability
 
 router = APIRouter()
 
+TEACHER_INCLUDES = {"courses", "course_count"}
+# Tables read by the teacher list, whose writes invalidate its cached responses
+TEACHER_LIST_TABLES = ("teachers", "courses")
+
+# Dependents first: each chunk runs these in order within one transaction
+TEACHER_DELETE_STATEMENTS = {
+    # Courses outlive their teacher; they are detached rather than deleted
+    "courses_detached": lambda chunk: update(models.Course)
+        .where(models.Course.teacher_id.in_(chunk)).values(teacher_id=None),
+    "revenue_rows_detached": lambda chunk: update(models.RevenueRollup)
+        .where(models.RevenueRollup.teacher_id.in_(chunk)).values(teacher_id=None),
+    "deleted": lambda chunk: delete(models.Teacher).where(models.Teacher.id.in_(chunk)),
+}
+
 
 # Teacher endpoints (No Admin Restriction)
 @router.post("/teachers/", response_model=schemas.Teacher, tags=["Teachers"])
@@ -18,51 +41,116 @@ async def create_teacher(teacher: schemas.TeacherCreate, db: Session = Depends(g
     db.refresh(db_teacher)
     return db_teacher
 
-@router.get("/teachers/", response_model=List[schemas.Teacher], tags=["Teachers"])
-async def list_teachers(skip: int = 0, limit: int = 500, db: Session = Depends(get_db)):
-    return db.query(models.Teacher).offset(skip).limit(limit).all()
+def query_teachers(db: Session, skip: int, limit: int, includes: set):
+    query = db.query(models.Teacher)
+    if "courses" in includes:
+        query = query.options(selectinload(models.Teacher.courses))
+    if "course_count" in includes:
+        counts = db.query(
+            models.Course.teacher_id,
+            func.count(models.Course.id).label("course_count")
+        ).group_by(models.Course.teacher_id).subquery()
+        query = query.outerjoin(counts, counts.c.teacher_id == models.Teacher.id)\
+            .add_columns(func.coalesce(counts.c.course_count, 0))
+        rows = query.offset(skip).limit(limit).all()
+        return [with_includes(teacher, includes, course_count=count) for teacher, count in rows]
+    return [with_includes(teacher, includes) for teacher in query.offset(skip).limit(limit).all()]
+
+@router.get("/teachers/", response_model=List[schemas.TeacherDetail], response_model_exclude_unset=True, tags=["Teachers"])
+async def list_teachers(request: Request, skip: int = 0, limit: int = 500, include: Optional[str] = None, exact: bool = True, db: Session = Depends(get_read_db)):
+    """Lists teachers; ?include=courses,course_count adds related data in a fixed number of queries."""
+    includes = parse_include(include, TEACHER_INCLUDES)
+    response = cached_response(
+        request, db, TEACHER_LIST_TABLES, List[schemas.TeacherDetail],
+        lambda: query_teachers(db, skip, limit, includes), exclude_unset=True
+    )
+    response.headers["X-Total-Count"] = str(table_count(db, models.Teacher, exact))
+    return response
+
+@router.get("/teachers/changes", response_model=schemas.Changes[schemas.Teacher], tags=["Teachers"])
+async def teacher_changes(since: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Teachers created, updated or deleted since the `since` token; pass the returned token next time."""
+    return changes_since(db, models.Teacher, since)
+
+@router.get("/teachers/{teacher_id}/availability", response_model=schemas.TeacherAvailability, response_model_exclude_none=True, tags=["Teachers"])
+async def get_teacher_availability(
+    teacher_id: int,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_read_db)
+):
+    """The teacher's courses between `from` and `to` and the free periods left around them."""
+    start, end = naive_utc(start), naive_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if not get_by_id(db, models.Teacher, teacher_id):
+        raise HTTPException(status_code=404, detail="Teacher not found")
+    return teacher_availability(db, teacher_id, start, end)
 
 @router.put("/teachers/bulk-activate", tags=["Teachers"])
-async def bulk_activate_teachers(teacher_ids: List[int], db: Session = Depends(get_db)):
+async def bulk_activate_teachers(teacher_ids: List[int], db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    updated = existing_ids(db, models.Teacher, teacher_ids)
     db.query(models.Teacher).filter(models.Teacher.id.in_(teacher_ids)).update({models.Teacher.active: True})
     db.commit()
+    audit_log.record(audit, "activate", "teachers", updated)
     return {"message": f"{len(teacher_ids)} teachers activated successfully"}
 
 @router.put("/teachers/bulk-deactivate", tags=["Teachers"])
-async def bulk_deactivate_teachers(teacher_ids: List[int], db: Session = Depends(get_db)):
+async def bulk_deactivate_teachers(teacher_ids: List[int], db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    updated = existing_ids(db, models.Teacher, teacher_ids)
     db.query(models.Teacher).filter(models.Teacher.id.in_(teacher_ids)).update({models.Teacher.active: False})
     db.commit()
+    audit_log.record(audit, "deactivate", "teachers", updated)
     return {"message": f"{len(teacher_ids)} teachers deactivated successfully"}
 
 @router.delete("/teachers/bulk-delete", tags=["Teachers"])
-async def bulk_delete_teachers(teacher_ids: List[int], db: Session = Depends(get_db)):
-    db.query(models.Teacher).filter(models.Teacher.id.in_(teacher_ids)).delete(synchronize_session=False)
-    db.commit()
-    return {"message": f"{len(teacher_ids)} teachers deleted successfully"}
+async def bulk_delete_teachers(teacher_ids: List[int], chunk_size: Optional[int] = Query(None, ge=1), db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    deleted = existing_ids(db, models.Teacher, teacher_ids, chunk_size)
+    totals = execute_in_chunks(
+        db, teacher_ids, TEACHER_DELETE_STATEMENTS, chunk_size,
+        on_commit=audit_log.chunk_recorder(audit, "delete", "teachers", deleted)
+    )
+    return {"message": f"{totals['deleted']} teachers deleted successfully", **totals}
 
 @router.delete("/teachers/{teacher_id}", tags=["Teachers"])
-async def delete_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = db.query(models.Teacher).filter(models.Teacher.id == teacher_id).first()
+async def delete_teacher(teacher_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    teacher = get_by_id(db, models.Teacher, teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
+    # The ORM detaches the teacher's courses; their revenue rows are detached here, as in bulk-delete
+    db.query(models.RevenueRollup).filter(models.RevenueRollup.teacher_id == teacher_id)\
+        .update({models.RevenueRollup.teacher_id: None}, synchronize_session=False)
     db.delete(teacher)
     db.commit()
+    audit_log.record(audit, "delete", "teachers", [teacher_id])
     return {"message": "Teacher deleted successfully"}
 
 @router.put("/teachers/{teacher_id}/activate", tags=["Teachers"])
-async def activate_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = db.query(models.Teacher).filter(models.Teacher.id == teacher_id).first()
+async def activate_teacher(teacher_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    teacher = get_by_id(db, models.Teacher, teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     teacher.active = True
     db.commit()
+    audit_log.record(audit, "activate", "teachers", [teacher_id])
     return {"message": "Teacher activated successfully"}
 
 @router.put("/teachers/{teacher_id}/deactivate", tags=["Teachers"])
-async def deactivate_teacher(teacher_id: int, db: Session = Depends(get_db)):
-    teacher = db.query(models.Teacher).filter(models.Teacher.id == teacher_id).first()
+async def deactivate_teacher(teacher_id: int, db: Session = Depends(get_db), audit: AuditContext = Depends(audit_context)):
+    teacher = get_by_id(db, models.Teacher, teacher_id)
     if not teacher:
         raise HTTPException(status_code=404, detail="Teacher not found")
     teacher.active = False
     db.commit()
+    audit_log.record(audit, "deactivate", "teachers", [teacher_id])
     return {"message": "Teacher deactivated successfully"}
+
+@runner.register("teachers.bulk_delete", max_concurrency=1, params=schemas.TeacherBulkDeleteParams)
+def bulk_delete_teachers_job(ctx, params):
+    with SessionLocal() as db:
+        deleted = existing_ids(db, models.Teacher, params["teacher_ids"], params.get("chunk_size"))
+        totals = execute_in_chunks(
+            db, params["teacher_ids"], TEACHER_DELETE_STATEMENTS, params.get("chunk_size"), on_chunk=ctx.progress,
+            on_commit=audit_log.chunk_recorder(AuditContext(None, f"job {ctx.job_id}"), "delete", "teachers", deleted)
+        )
+    return totals
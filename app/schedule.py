@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from . import models
+
+# Courses of a teacher overlapping [start, end). ix_courses_teacher_schedule seeks to
+# the teacher's courses ending after `start`, so finished courses are never read and
+# the cost grows with the teacher's current and future courses, not their history.
+OVERLAPPING_COURSES = select(models.Course.id, models.Course.start_date, models.Course.end_date)\
+    .where(
+        models.Course.teacher_id == bindparam("teacher_id"),
+        models.Course.end_date > bindparam("start"),
+        models.Course.start_date < bindparam("end"),
+        models.Course.id != bindparam("exclude_id"),
+    )\
+    .order_by(models.Course.start_date)
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """`value` as the naive UTC datetime course dates are stored as."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def overlapping_courses(db: Session, teacher_id: int, start: datetime, end: datetime, exclude_course_id: Optional[int] = None):
+    """(id, start_date, end_date) of the teacher's courses overlapping [start, end), by start date."""
+    # Course ids start at 1, so 0 excludes nothing
+    return db.execute(OVERLAPPING_COURSES, {
+        "teacher_id": teacher_id, "start": start, "end": end, "exclude_id": exclude_course_id or 0
+    }).all()
+
+def check_schedule(db: Session, teacher_id: Optional[int], start: Optional[datetime], end: Optional[datetime], course_id: Optional[int] = None):
+    """Raises 409 when the teacher already has a course overlapping [start, end).
+
+    Locks the teacher row first so concurrent assignments to the same teacher are checked
+    one after the other; the caller commits or rolls back.
+    """
+    start, end = naive_utc(start), naive_utc(end)
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if teacher_id is None or start is None or end is None:
+        return
+    db.query(models.Teacher.id).filter(models.Teacher.id == teacher_id).with_for_update().first()
+    conflicts = overlapping_courses(db, teacher_id, start, end, course_id)
+    if conflicts:
+        db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail=f"Teacher {teacher_id} already teaches course(s) {', '.join(str(row.id) for row in conflicts)} in that period"
+        )
+
+def teacher_availability(db: Session, teacher_id: int, start: datetime, end: datetime) -> dict:
+    """Busy intervals (the overlapping courses) and the free gaps between them within [start, end)."""
+    start, end = naive_utc(start), naive_utc(end)
+    busy, free = [], []
+    cursor = start
+    for row in overlapping_courses(db, teacher_id, start, end):
+        busy.append({"course_id": row.id, "start": row.start_date, "end": row.end_date})
+        if row.start_date > cursor:
+            free.append({"start": cursor, "end": row.start_date})
+        cursor = max(cursor, row.end_date)
+    if cursor < end:
+        free.append({"start": cursor, "end": end})
+    return {"teacher_id": teacher_id, "busy": busy, "free": free}
@@ -1,6 +1,10 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Annotated, Any, Dict, Generic, Optional, List, TypeVar, Union
+from datetime import date, datetime
+from os import getenv
+
+# Longest from/to window a revenue projection may cover
+PROJECTION_MAX_MONTHS = int(getenv("PROJECTION_MAX_MONTHS", "120"))
 
 # User Schemas
 class UserBase(BaseModel):
@@ -35,10 +39,17 @@ class Student(StudentBase):
     id: int
     enrollment_date: datetime
     active: bool
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class StudentImportResult(BaseModel):
+    rows: int
+    imported: int
+    failed: int
+    error_report_id: Optional[str] = None
+
 # Teacher Schemas
 class TeacherBase(BaseModel):
     first_name: str
@@ -54,6 +65,7 @@ class TeacherCreate(TeacherBase):
 class Teacher(TeacherBase):
     id: int
     active: bool
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -72,9 +84,21 @@ class CourseBase(BaseModel):
 class CourseCreate(CourseBase):
     pass
 
+class CourseUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    level: Optional[str] = None
+    max_students: Optional[int] = None
+    price: Optional[float] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    teacher_id: Optional[int] = None
+
 class Course(CourseBase):
     id: int
     active: bool
+    teacher_id: Optional[int] = None  # Unset once the course's teacher has been deleted
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -88,13 +112,175 @@ class EnrollmentBase(BaseModel):
 class EnrollmentCreate(EnrollmentBase):
     pass
 
+class PaymentStatusUpdate(BaseModel):
+    payment_status: str
+
+class BulkEnrollmentCreate(BaseModel):
+    student_ids: List[int]
+    payment_status: str = "Pending"
+
+class BulkEnrollmentResult(BaseModel):
+    course_id: int
+    enrolled: List[int]
+    already_enrolled: List[int]
+    unknown_students: List[int]
+
 class Enrollment(EnrollmentBase):
     id: int
     enrollment_date: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class WaitlistEntry(BaseModel):
+    id: int
+    course_id: int
+    student_id: int
+    payment_status: Optional[str] = None
+    created_at: datetime
+    position: int  # 1 is next in line
+
+class WaitlistPromotion(BaseModel):
+    course_id: int
+    enrolled: List[int]  # Student ids moved from the waitlist into the course
+    waiting: int
+
+# Nested Resource Schemas (?include=)
+class StudentDetail(Student):
+    enrollments: Optional[List[Enrollment]] = None
+    enrollment_count: Optional[int] = None
+    archived: Optional[bool] = None  # Only set with ?include_archived=true
+
+class TeacherDetail(Teacher):
+    courses: Optional[List[Course]] = None
+    course_count: Optional[int] = None
+
+class CourseDetail(Course):
+    teacher: Optional[Teacher] = None
+    enrollments: Optional[List[Enrollment]] = None
+    enrollment_count: Optional[int] = None
+
+class EnrollmentDetail(Enrollment):
+    student: Optional[Student] = None
+    course: Optional[Course] = None
+    archived: Optional[bool] = None  # Only set with ?include_archived=true
+
+# Delta Sync Schemas
+T = TypeVar("T")
+
+class Changes(BaseModel, Generic[T]):
+    token: str  # Pass as ?since= on the next call
+    changed: List[T]  # Rows created or updated since the previous token
+    deleted: List[int]  # Ids deleted since the previous token
+
+# Audit Schemas
+class AuditEvent(BaseModel):
+    id: int
+    occurred_at: datetime
+    actor: Optional[str] = None
+    client: Optional[str] = None
+    action: str
+    entity: str
+    entity_id: int
+
+    class Config:
+        from_attributes = True
+
+# Slow Query Schemas
+class SlowQuery(BaseModel):
+    sql: str  # Normalized: literals and parameters replaced by ?
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    routes: Dict[str, int]  # Executions per "METHOD /path/{template}", or "background"
+    params: List[str]  # Types of the first execution's parameters; values are never kept
+    plan: Optional[List[Dict[str, Any]]] = None  # With SLOW_QUERY_EXPLAIN=true
+
+# Job Schemas
+class ChunkedJobParams(BaseModel):
+    chunk_size: Optional[int] = Field(None, ge=1)
+
+class StudentBulkDeleteParams(ChunkedJobParams):
+    student_ids: List[int] = Field(..., min_length=1)
+
+class CourseBulkDeleteParams(ChunkedJobParams):
+    course_ids: List[int] = Field(..., min_length=1)
+
+class TeacherBulkDeleteParams(ChunkedJobParams):
+    teacher_ids: List[int] = Field(..., min_length=1)
+
+class JobCreate(BaseModel):
+    job_type: str
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    processed: int
+    total: Optional[int] = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+# Teacher Schedule Schemas
+class ScheduleInterval(BaseModel):
+    start: datetime
+    end: datetime
+    course_id: Optional[int] = None  # Set on busy intervals
+
+class TeacherAvailability(BaseModel):
+    teacher_id: int
+    busy: List[ScheduleInterval]  # Courses overlapping the window, with their full dates
+    free: List[ScheduleInterval]  # Gaps between them, clipped to the window
+
+# Report Schemas
+class RevenueBucket(BaseModel):
+    key: Optional[Union[str, int]] = None
+    revenue: float
+
+class ProjectionScenario(BaseModel):
+    name: Optional[str] = None
+    enrollment_multiplier: float = Field(1.0, ge=0)  # Applied to current paid enrollments
+    fill_rate: Optional[float] = Field(None, ge=0)  # Fraction of max_students; replaces enrollment_multiplier
+    price_multiplier: float = Field(1.0, ge=0)
+    level_multipliers: Dict[str, Annotated[float, Field(ge=0)]] = {}
+    course_enrollments: Dict[int, Annotated[float, Field(ge=0)]] = {}  # Explicit enrollments for individual courses
+    cap_at_capacity: bool = True
+
+class ProjectionRequest(BaseModel):
+    start: date = Field(..., alias="from")
+    end: date = Field(..., alias="to")
+    active_only: bool = True
+    scenarios: List[ProjectionScenario] = Field(..., min_length=1, max_length=10000)
+
+    @model_validator(mode="after")
+    def limit_window(self):
+        months = (self.end.year - self.start.year) * 12 + self.end.month - self.start.month + 1
+        if months > PROJECTION_MAX_MONTHS:
+            raise ValueError(f"'from' to 'to' may span at most {PROJECTION_MAX_MONTHS} months")
+        return self
+
+class ScenarioProjection(BaseModel):
+    name: str
+    total: float
+    monthly: List[float]
+
+class ProjectionResult(BaseModel):
+    months: List[str]
+    courses: int
+    scenarios: List[ScenarioProjection]
+
 # Response Schemas
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,162 @@
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from os import getenv
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statements taking at least this long are logged and aggregated
+SLOW_QUERY_MS = float(getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_ENABLED = getenv("SLOW_QUERY_LOG", "true").lower() == "true"
+# Capture the plan of each slow SELECT once, on a background thread
+SLOW_QUERY_EXPLAIN = getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+# Distinct normalized statements kept per worker; the one with the least total time makes room
+SLOW_QUERY_MAX_STATEMENTS = int(getenv("SLOW_QUERY_MAX_STATEMENTS", "500"))
+
+_STARTED = "slow_query_started"
+_EXPLAINING = "slow_query_explaining"
+
+_current_scope: ContextVar[Optional[dict]] = ContextVar("slow_query_scope", default=None)
+
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),  # String literals
+    (re.compile(r"%\(\w+\)s|:\w+|\$\d+|%s"), "?"),  # Bind parameters of every paramstyle
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),  # Numeric literals
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?, ...)"),  # Expanded IN lists of any length
+    (re.compile(r"\s+"), " "),
+]
+
+def normalize(statement: str) -> str:
+    """The statement with literals and parameters replaced, so repeats aggregate together."""
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+def redact(parameters) -> list:
+    """Parameter types (and string lengths) only; values can hold personal data."""
+    if isinstance(parameters, dict):
+        parameters = list(parameters.values())
+    elif not isinstance(parameters, (list, tuple)):
+        return []
+    return [
+        f"str({len(value)})" if isinstance(value, str) else type(value).__name__
+        for value in list(parameters)[:20]
+    ]
+
+_route_paths: Dict[int, Dict] = {}
+
+def current_route() -> Optional[str]:
+    """Method and path template of the request being served, e.g. "GET /api/students/{student_id}"."""
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    endpoint, app = scope.get("endpoint"), scope.get("app")
+    if endpoint is not None and app is not None:
+        paths = _route_paths.get(id(app))
+        if paths is None:
+            paths = _route_paths[id(app)] = {route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")}
+        if endpoint in paths:
+            return f"{scope['method']} {paths[endpoint]}"
+    return f"{scope['method']} {scope['path']}"
+
+class SlowQueryLog:
+    """Per-worker aggregate of slow statements, keyed by their normalized SQL."""
+
+    def __init__(self, threshold_ms: float, max_statements: int, explain: bool):
+        self.threshold = threshold_ms / 1000
+        self.max_statements = max_statements
+        self.explain = explain
+        self.statements: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._explainer = ThreadPoolExecutor(1, thread_name_prefix="slow-query-explain") if explain else None
+
+    def record(self, conn, statement: str, parameters, elapsed: float, executemany: bool):
+        sql = normalize(statement)
+        route = current_route()
+        params = redact(parameters[0] if executemany and parameters else parameters)
+        logger.warning("Slow query %.1f ms [%s] %s params=%s", elapsed * 1000, route or "background", sql, params)
+        with self._lock:
+            entry = self.statements.get(sql)
+            if entry is None:
+                if len(self.statements) >= self.max_statements:
+                    del self.statements[min(self.statements, key=lambda key: self.statements[key]["total_ms"])]
+                entry = self.statements[sql] = {
+                    "sql": sql, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "routes": {}, "params": params, "plan": None,
+                }
+                explain = self.explain and not executemany and sql.lower().startswith("select")
+            else:
+                explain = False
+            entry["count"] += 1
+            entry["total_ms"] += elapsed * 1000
+            entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+            entry["routes"][route or "background"] = entry["routes"].get(route or "background", 0) + 1
+        if explain:
+            self._explainer.submit(self._explain, conn.engine, sql, statement, parameters)
+
+    def _explain(self, engine: Engine, sql: str, statement: str, parameters):
+        prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            with engine.connect() as conn:
+                conn.info[_EXPLAINING] = True
+                try:
+                    result = conn.exec_driver_sql(prefix + statement, parameters)
+                    plan = [dict(row) for row in result.mappings()]
+                finally:
+                    conn.info.pop(_EXPLAINING, None)
+        except Exception as exc:
+            plan = [{"error": str(exc)}]
+        with self._lock:
+            if sql in self.statements:
+                self.statements[sql]["plan"] = plan
+
+    def top(self, limit: int, order_by: str = "total_ms") -> List[dict]:
+        with self._lock:
+            entries = sorted(self.statements.values(), key=lambda entry: entry[order_by], reverse=True)[:limit]
+            return [{**entry, "avg_ms": entry["total_ms"] / entry["count"], "routes": dict(entry["routes"])} for entry in entries]
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_MAX_STATEMENTS, SLOW_QUERY_EXPLAIN)
+
+if SLOW_QUERY_LOG_ENABLED:
+    # On the Engine class, so replica engines are covered too
+    # The start time lives on the statement's execution context, so a statement that
+    # raises (and never reaches after_cursor_execute) leaves nothing behind
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            setattr(context, _STARTED, time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, _STARTED, None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed >= slow_query_log.threshold and not conn.info.get(_EXPLAINING):
+            slow_query_log.record(conn, statement, parameters, elapsed, executemany)
+
+class SlowQueryRouteMiddleware:
+    """Makes the current request visible to the slow query log, so entries name their route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The router adds the matched endpoint to this same scope dict later
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
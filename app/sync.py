@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+from os import getenv
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+from . import models
+from .database import SessionLocal
+from .jobs import runner
+
+# Each token reaches back this far, so rows whose transaction committed a little
+# after they were stamped (or that reached a replica late) are still picked up
+SYNC_OVERLAP_SECONDS = float(getenv("SYNC_OVERLAP_SECONDS", "30"))
+# Tombstones are kept this long; older tokens get a 410 and must reload in full
+SYNC_RETENTION_DAYS = int(getenv("SYNC_RETENTION_DAYS", "30"))
+
+SYNCED_TABLES = {"students", "teachers", "courses", "course_enrollments"}
+
+def _tombstones(table_name: str, row_ids) -> list:
+    now = datetime.utcnow()
+    return [{"table_name": table_name, "row_id": row_id, "deleted_at": now} for row_id in row_ids]
+
+@event.listens_for(Session, "after_flush")
+def _record_deleted_objects(session, flush_context):
+    rows = [
+        row
+        for obj in session.deleted if obj.__table__.name in SYNCED_TABLES
+        for row in _tombstones(obj.__table__.name, [obj.id])
+    ]
+    if rows:
+        session.connection().execute(insert(models.DeletedRow.__table__), rows)
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_bulk_deletes(orm_execute_state):
+    if not orm_execute_state.is_delete:
+        return
+    statement = orm_execute_state.statement
+    table = getattr(statement, "table", None)
+    if table is None or table.name not in SYNCED_TABLES:
+        return
+    # Bulk deletes do not say which rows they remove, so those are looked up first
+    ids = select(table.c.id)
+    if statement.whereclause is not None:
+        ids = ids.where(statement.whereclause)
+    session = orm_execute_state.session
+    rows = _tombstones(table.name, session.execute(ids).scalars().all())
+    if rows:
+        session.execute(insert(models.DeletedRow.__table__), rows)
+
+def encode_token(moment: datetime) -> str:
+    return str(int(moment.replace(tzinfo=timezone.utc).timestamp() * 1_000_000))
+
+def decode_token(token: str) -> datetime:
+    try:
+        moment = datetime.fromtimestamp(int(token) / 1_000_000, tz=timezone.utc).replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    if moment < datetime.utcnow() - timedelta(days=SYNC_RETENTION_DAYS):
+        raise HTTPException(status_code=410, detail="Sync token expired, reload without ?since=")
+    return moment
+
+def changes_since(db: Session, model, since: Optional[str]) -> dict:
+    """Rows of `model` changed and ids deleted since the token; without one, every row.
+
+    Tokens overlap by SYNC_OVERLAP_SECONDS, so a client may see a row again and
+    must apply changes as upserts.
+    """
+    started = datetime.utcnow()
+    query = db.query(model)
+    deleted = []
+    if since:
+        moment = decode_token(since)
+        query = query.filter(model.updated_at > moment)
+        deleted = db.execute(
+            select(models.DeletedRow.row_id).distinct().where(
+                models.DeletedRow.table_name == model.__tablename__,
+                models.DeletedRow.deleted_at > moment,
+            )
+        ).scalars().all()
+    return {
+        "token": encode_token(started - timedelta(seconds=SYNC_OVERLAP_SECONDS)),
+        "changed": query.order_by(model.id).all(),
+        "deleted": deleted,
+    }
+
+def prune_tombstones(db: Session) -> dict:
+    cutoff = datetime.utcnow() - timedelta(days=SYNC_RETENTION_DAYS)
+    result = db.execute(delete(models.DeletedRow).where(models.DeletedRow.deleted_at < cutoff))
+    db.commit()
+    return {"deleted": result.rowcount}
+
+@runner.register("sync.prune_tombstones", max_concurrency=1)
+def prune_tombstones_job(ctx, params):
+    with SessionLocal() as db:
+        return prune_tombstones(db)
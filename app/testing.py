@@ -0,0 +1,59 @@
+"""Pytest fixtures that undo every test's writes by rolling back one outer transaction.
+
+Enable them from a conftest.py with `pytest_plugins = ["app.testing"]`. Only code
+using the `db` session (directly or through the route dependencies) is covered;
+background work opening its own SessionLocal, such as jobs, the audit writer and
+the enrollment queue, commits for real.
+"""
+import pytest
+from sqlalchemy.orm import Session
+from . import counts
+from .cache import response_cache
+from .database import engine, get_db, get_read_db
+
+def clear_caches():
+    """Empties the caches keyed on table_versions, which a rollback sets back to
+    numbers they were already cached under."""
+    response_cache.clear()
+    counts.clear()
+
+@pytest.fixture
+def db():
+    """A session whose commits only release savepoints of a transaction rolled back after the test."""
+    connection = engine.connect()
+    sqlite = connection.dialect.name == "sqlite"
+    if sqlite:
+        # pysqlite decides on its own when to BEGIN, which defeats savepoints; take over for this connection
+        driver_connection = connection.connection.driver_connection
+        isolation_level, driver_connection.isolation_level = driver_connection.isolation_level, None
+    transaction = connection.begin()
+    if sqlite:
+        connection.exec_driver_sql("BEGIN")
+    session = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    clear_caches()
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        clear_caches()
+        if sqlite:
+            driver_connection.isolation_level = isolation_level
+        connection.close()
+
+@pytest.fixture
+def client(db):
+    """A TestClient whose requests all use the test's `db` session, replicas included."""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    def override():
+        yield db
+
+    app.dependency_overrides[get_db] = override
+    app.dependency_overrides[get_read_db] = override
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
@@ -1,4 +1,4 @@
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal
 from app.models import User
 from app.security import get_password_hash
 
@@ -32,6 +32,5 @@ def create_test_user():
         db.close()
 
 if __name__ == "__main__":
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    # Tables are created by `alembic upgrade head`
     create_test_user()
@@ -0,0 +1,38 @@
+"""Production server settings: `gunicorn -c gunicorn.conf.py main:app`.
+
+Every setting can be tuned through the environment. SIGTERM shuts down gracefully.
+SIGHUP replaces the workers gracefully, but with PRELOAD_APP=true (the default) the
+new workers fork from the master's already-imported app, so deploying new code
+needs a full restart; set PRELOAD_APP=false to deploy with SIGHUP instead.
+"""
+import multiprocessing
+from os import getenv
+
+bind = getenv("BIND", "0.0.0.0:8000")
+workers = int(getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = getenv("PRELOAD_APP", "true").lower() == "true"
+
+# Pending connections the kernel queues before refusing new ones
+backlog = int(getenv("BACKLOG", "2048"))
+# Seconds an idle keep-alive connection stays open; keep above the load balancer's idle timeout
+keepalive = int(getenv("KEEPALIVE", "75"))
+timeout = int(getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(getenv("GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting them all at once
+max_requests = int(getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(getenv("MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = getenv("ACCESS_LOG", "-")
+loglevel = getenv("LOG_LEVEL", "info")
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared between processes
+    from app.database import engine, replicas
+    engine.dispose(close=False)
+    for replica in (replicas.engines if replicas else []):
+        replica.dispose(close=False)
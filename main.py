@@ -1,19 +1,41 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-import uvicorn
-from app.database import engine, Base, get_db
-from app.models import User
-from app.routes import auth, courses, students, teachers, enrollments, dashboard
+from app.database import get_db, replicas, ReadYourWritesMiddleware
+from app.routes import auth, courses, students, teachers, enrollments, dashboard, jobs, reports, audit, archive, diagnostics
+from app.jobs import runner
+from app.admission import admission, AdmissionMiddleware, ADMISSION_ENABLED
+from app.cache import response_cache, RESPONSE_CACHE_ENABLED
+from app.events import broker
+from app.audit import audit_log
+from app.enrollment_queue import enrollment_queue, ENROLLMENT_QUEUE_ENABLED
+from app.profiling import ProfilingMiddleware, PROFILING_ENABLED
+from app.slow_queries import SlowQueryRouteMiddleware, SLOW_QUERY_LOG_ENABLED
+from app.docs import install_docs, openapi_document
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: run `alembic upgrade head` before starting the app
 
 app = FastAPI(
     title="ELTS School API",
     description="API for ELT School of English Admin Dashboard",
-    version="1.0.0"
+    version="1.0.0",
+    # Served from the cached custom schema instead (see app/docs.py)
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
 )
+install_docs(app)
+
+if SLOW_QUERY_LOG_ENABLED:
+    app.add_middleware(SlowQueryRouteMiddleware)
+
+# Inside admission control, so time spent queued there is not profiled
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Admission control sits inside CORS so shed responses still carry CORS headers
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 
 # Configure CORS
 origins = [
@@ -29,9 +51,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    # Credentialed requests ignore the "*" wildcard, so headers clients read are listed too
+    expose_headers=["*", "X-Total-Count"],
 )
 
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(
     auth.router,
@@ -65,9 +91,56 @@ app.include_router(
     prefix="/api",
 )
 
+app.include_router(
+    jobs.router,
+    prefix="/api",
+)
+
+app.include_router(
+    reports.router,
+    prefix="/api",
+)
+
+app.include_router(
+    audit.router,
+    prefix="/api",
+)
+
+app.include_router(
+    archive.router,
+    prefix="/api",
+)
+
+app.include_router(
+    diagnostics.router,
+    prefix="/api",
+)
+
+@app.on_event("startup")
+def start_job_runner():
+    runner.start()
+    audit_log.start()
+    # Built once here, after every router is included, rather than on the first /openapi.json
+    openapi_document.load(app)
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    runner.shutdown()
+    # After the runner, so audit events recorded by finishing jobs are flushed too
+    audit_log.shutdown()
+
 @app.get("/api/health", tags=["Dashboard"])
 def health_check():
-    return {"status": "healthy", "service": "ELTS Backend"}
+    return {
+        # Degraded while requests are being shed, so overload is visible to monitoring
+        "status": "degraded" if admission.shedding() else "healthy",
+        "service": "ELTS Backend",
+        "admission": admission.stats() if ADMISSION_ENABLED else None,
+        "response_cache": response_cache.stats() if RESPONSE_CACHE_ENABLED else None,
+        "dashboard_stream": broker.stats(),
+        "audit": audit_log.stats(),
+        "enrollment_queue": enrollment_queue.stats() if ENROLLMENT_QUEUE_ENABLED else None,
+    }
 
 @app.get("/", tags=["Dashboard"])
 async def root():
@@ -78,4 +151,6 @@ async def root():
     }
 
 if __name__ == "__main__":
+    # Development server; in production use `gunicorn -c gunicorn.conf.py main:app`
+    import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""Add course teacher schedule index
+
+Revision ID: 383fe7717761
+Revises: f28a6c4d1e73
+Create Date: 2026-10-19 16:42:26.738630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '383fe7717761'
+down_revision: Union[str, None] = 'f28a6c4d1e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_courses_teacher_schedule', 'courses', ['teacher_id', 'end_date', 'start_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_courses_teacher_schedule', table_name='courses')
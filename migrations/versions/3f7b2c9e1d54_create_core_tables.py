@@ -0,0 +1,99 @@
+"""Create core tables
+
+Revision ID: 3f7b2c9e1d54
+Revises: eb5525dfe3ee
+Create Date: 2026-10-19 13:41:05.730158
+
+Until now students, teachers, courses and course_enrollments were created by
+Base.metadata.create_all at startup, so databases that already have them are
+left untouched.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3f7b2c9e1d54'
+down_revision: Union[str, None] = 'eb5525dfe3ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'teachers' not in existing:
+        op.create_table('teachers',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=True),
+        sa.Column('last_name', sa.String(length=50), nullable=True),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('specialization', sa.String(length=100), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_teachers_email'), 'teachers', ['email'], unique=True)
+        op.create_index(op.f('ix_teachers_id'), 'teachers', ['id'], unique=False)
+
+    if 'students' not in existing:
+        op.create_table('students',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=True),
+        sa.Column('last_name', sa.String(length=50), nullable=True),
+        sa.Column('email', sa.String(length=255), nullable=True),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('level', sa.String(length=20), nullable=True),
+        sa.Column('enrollment_date', sa.DateTime(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_students_email'), 'students', ['email'], unique=True)
+        op.create_index(op.f('ix_students_id'), 'students', ['id'], unique=False)
+
+    if 'courses' not in existing:
+        op.create_table('courses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('level', sa.String(length=20), nullable=True),
+        sa.Column('max_students', sa.Integer(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=True),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('teacher_id', sa.Integer(), nullable=True),
+        sa.Column('active', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_courses_id'), 'courses', ['id'], unique=False)
+
+    if 'course_enrollments' not in existing:
+        op.create_table('course_enrollments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('course_id', sa.Integer(), nullable=True),
+        sa.Column('enrollment_date', sa.DateTime(), nullable=True),
+        sa.Column('payment_status', sa.String(length=20), nullable=True),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_course_enrollments_id'), 'course_enrollments', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_course_enrollments_id'), table_name='course_enrollments')
+    op.drop_table('course_enrollments')
+    op.drop_index(op.f('ix_courses_id'), table_name='courses')
+    op.drop_table('courses')
+    op.drop_index(op.f('ix_students_id'), table_name='students')
+    op.drop_index(op.f('ix_students_email'), table_name='students')
+    op.drop_table('students')
+    op.drop_index(op.f('ix_teachers_id'), table_name='teachers')
+    op.drop_index(op.f('ix_teachers_email'), table_name='teachers')
+    op.drop_table('teachers')
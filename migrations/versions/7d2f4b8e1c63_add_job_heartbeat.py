@@ -0,0 +1,27 @@
+"""Add job heartbeat
+
+Revision ID: 7d2f4b8e1c63
+Revises: fc3b39d7f677
+Create Date: 2026-10-19 18:12:07.514392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7d2f4b8e1c63'
+down_revision: Union[str, None] = 'fc3b39d7f677'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'heartbeat_at')
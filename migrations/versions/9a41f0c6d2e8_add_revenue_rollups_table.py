@@ -0,0 +1,46 @@
+"""Add revenue rollups table
+
+Revision ID: 9a41f0c6d2e8
+Revises: 5c2e8d41a7b3
+Create Date: 2026-10-19 11:03:17.284519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9a41f0c6d2e8'
+down_revision: Union[str, None] = '5c2e8d41a7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('revenue_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=True),
+    sa.Column('course_id', sa.Integer(), nullable=True),
+    sa.Column('teacher_id', sa.Integer(), nullable=True),
+    sa.Column('level', sa.String(length=20), nullable=True),
+    sa.Column('share', sa.Float(), nullable=True),
+    sa.Column('paid_enrollments', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('course_id', 'month', name='uq_revenue_rollups_course_month')
+    )
+    op.create_index(op.f('ix_revenue_rollups_course_id'), 'revenue_rollups', ['course_id'], unique=False)
+    op.create_index(op.f('ix_revenue_rollups_id'), 'revenue_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_revenue_rollups_month'), 'revenue_rollups', ['month'], unique=False)
+    op.create_index(op.f('ix_revenue_rollups_teacher_id'), 'revenue_rollups', ['teacher_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_revenue_rollups_teacher_id'), table_name='revenue_rollups')
+    op.drop_index(op.f('ix_revenue_rollups_month'), table_name='revenue_rollups')
+    op.drop_index(op.f('ix_revenue_rollups_id'), table_name='revenue_rollups')
+    op.drop_index(op.f('ix_revenue_rollups_course_id'), table_name='revenue_rollups')
+    op.drop_table('revenue_rollups')
@@ -0,0 +1,35 @@
+"""Add table versions
+
+Revision ID: c81d4e2f9b07
+Revises: 9a41f0c6d2e8
+Create Date: 2026-10-19 15:22:48.961327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c81d4e2f9b07'
+down_revision: Union[str, None] = '9a41f0c6d2e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 0}
+        for name in ('students', 'teachers', 'courses', 'course_enrollments')
+    ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('table_versions')
@@ -0,0 +1,49 @@
+"""Add updated_at columns and deleted rows
+
+Revision ID: d4a7e9b2c615
+Revises: c81d4e2f9b07
+Create Date: 2026-10-19 16:05:12.308114
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd4a7e9b2c615'
+down_revision: Union[str, None] = 'c81d4e2f9b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNCED_TABLES = ('students', 'teachers', 'courses', 'course_enrollments')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    now = datetime.utcnow()
+    for table_name in SYNCED_TABLES:
+        op.add_column(table_name, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Existing rows count as changed at upgrade time
+        op.execute(sa.table(table_name, sa.column('updated_at', sa.DateTime())).update().values(updated_at=now))
+        op.create_index(op.f(f'ix_{table_name}_updated_at'), table_name, ['updated_at'], unique=False)
+    op.create_table('deleted_rows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_deleted_rows_id'), 'deleted_rows', ['id'], unique=False)
+    op.create_index('ix_deleted_rows_table_deleted_at', 'deleted_rows', ['table_name', 'deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_deleted_rows_table_deleted_at', table_name='deleted_rows')
+    op.drop_index(op.f('ix_deleted_rows_id'), table_name='deleted_rows')
+    op.drop_table('deleted_rows')
+    for table_name in reversed(SYNCED_TABLES):
+        op.drop_index(op.f(f'ix_{table_name}_updated_at'), table_name=table_name)
+        op.drop_column(table_name, 'updated_at')
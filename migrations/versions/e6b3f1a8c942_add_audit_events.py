@@ -0,0 +1,44 @@
+"""Add audit events
+
+Revision ID: e6b3f1a8c942
+Revises: d4a7e9b2c615
+Create Date: 2026-10-19 17:11:40.527301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e6b3f1a8c942'
+down_revision: Union[str, None] = 'd4a7e9b2c615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('audit_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('occurred_at', sa.DateTime(), nullable=False),
+    sa.Column('actor', sa.String(length=255), nullable=True),
+    sa.Column('client', sa.String(length=64), nullable=True),
+    sa.Column('action', sa.String(length=20), nullable=False),
+    sa.Column('entity', sa.String(length=64), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_events_id'), 'audit_events', ['id'], unique=False)
+    op.create_index(op.f('ix_audit_events_occurred_at'), 'audit_events', ['occurred_at'], unique=False)
+    op.create_index(op.f('ix_audit_events_actor'), 'audit_events', ['actor'], unique=False)
+    op.create_index('ix_audit_events_entity', 'audit_events', ['entity', 'entity_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_audit_events_entity', table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_actor'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_occurred_at'), table_name='audit_events')
+    op.drop_index(op.f('ix_audit_events_id'), table_name='audit_events')
+    op.drop_table('audit_events')
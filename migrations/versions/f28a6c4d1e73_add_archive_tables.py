@@ -0,0 +1,60 @@
+"""Add archive tables
+
+Revision ID: f28a6c4d1e73
+Revises: e6b3f1a8c942
+Create Date: 2026-10-19 17:58:03.114672
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f28a6c4d1e73'
+down_revision: Union[str, None] = 'e6b3f1a8c942'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archived_students',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=True),
+    sa.Column('last_name', sa.String(length=50), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=True),
+    sa.Column('level', sa.String(length=20), nullable=True),
+    sa.Column('enrollment_date', sa.DateTime(), nullable=True),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_students_email'), 'archived_students', ['email'], unique=False)
+    op.create_index(op.f('ix_archived_students_archived_at'), 'archived_students', ['archived_at'], unique=False)
+    op.create_table('archived_enrollments',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('course_id', sa.Integer(), nullable=True),
+    sa.Column('enrollment_date', sa.DateTime(), nullable=True),
+    sa.Column('payment_status', sa.String(length=20), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_enrollments_student_id'), 'archived_enrollments', ['student_id'], unique=False)
+    op.create_index(op.f('ix_archived_enrollments_course_id'), 'archived_enrollments', ['course_id'], unique=False)
+    op.create_index(op.f('ix_archived_enrollments_archived_at'), 'archived_enrollments', ['archived_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_archived_enrollments_archived_at'), table_name='archived_enrollments')
+    op.drop_index(op.f('ix_archived_enrollments_course_id'), table_name='archived_enrollments')
+    op.drop_index(op.f('ix_archived_enrollments_student_id'), table_name='archived_enrollments')
+    op.drop_table('archived_enrollments')
+    op.drop_index(op.f('ix_archived_students_archived_at'), table_name='archived_students')
+    op.drop_index(op.f('ix_archived_students_email'), table_name='archived_students')
+    op.drop_table('archived_students')
@@ -0,0 +1,42 @@
+"""Add course waitlist
+
+Revision ID: fc3b39d7f677
+Revises: 383fe7717761
+Create Date: 2026-10-19 16:44:35.273309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'fc3b39d7f677'
+down_revision: Union[str, None] = '383fe7717761'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('course_waitlist',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('payment_status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_course_waitlist_course_id'), 'course_waitlist', ['course_id'], unique=False)
+    op.create_index(op.f('ix_course_waitlist_id'), 'course_waitlist', ['id'], unique=False)
+    op.create_index(op.f('ix_course_waitlist_student_id'), 'course_waitlist', ['student_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_course_waitlist_student_id'), table_name='course_waitlist')
+    op.drop_index(op.f('ix_course_waitlist_id'), table_name='course_waitlist')
+    op.drop_index(op.f('ix_course_waitlist_course_id'), table_name='course_waitlist')
+    op.drop_table('course_waitlist')
@@ -0,0 +1,203 @@
+"""Writes a synthetic dataset straight to the database with bulk inserts.
+
+    python scripts/generate_data.py --students 200000 --teachers 2000 --courses 40000 --enrollments 1000000 --seed 42
+
+Rows are inserted in batches of --batch-size, one transaction per batch, with ids
+continuing from the current maximum, so a run can be stacked onto existing data.
+The same seed and options always produce the same rows. Dates come from --start,
+not from today. Each teacher's courses follow one another without overlapping, so
+the schedule grows longer with the number of courses per teacher. Revenue rollups
+are rebuilt at the end unless --skip-revenue is passed.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import func, insert
+from app import cache, models  # cache registers the table_versions listeners, so cached responses see the new rows
+from app.database import SessionLocal
+from app.revenue import rebuild_revenue
+
+FIRST_NAMES = ["Olivia", "Liam", "Emma", "Noah", "Amelia", "Oliver", "Sophia", "Elijah", "Mia", "Lucas",
+               "Yuki", "Mateo", "Aisha", "Chen", "Fatima", "Ivan", "Lucia", "Omar", "Priya", "Sven"]
+LAST_NAMES = ["Smith", "Garcia", "Kim", "Muller", "Rossi", "Silva", "Nguyen", "Kowalski", "Tanaka", "Haddad",
+              "Johnson", "Martin", "Novak", "Okafor", "Petrov", "Santos", "Schmidt", "Yilmaz", "Costa", "Brown"]
+SPECIALIZATIONS = ["General English", "Business English", "IELTS Preparation", "TOEFL Preparation",
+                   "Academic Writing", "Conversation Skills", "Pronunciation and Fluency"]
+
+def weights(value: str):
+    """Parses "Paid=7,Pending=2,Refunded=1" into (values, cumulative weights)."""
+    values, cumulative, total = [], [], 0.0
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        total += float(weight or 1)
+        values.append(name.strip())
+        cumulative.append(total)
+    return values, cumulative
+
+def int_range(value: str):
+    """Parses "10-30" (or "20") into an inclusive (low, high)."""
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+def batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+def next_id(db, model) -> int:
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+def students(args, first_id):
+    rng = random.Random(f"{args.seed}:students")
+    levels, level_weights = weights(args.levels)
+    span = (args.end - args.start).total_seconds()
+    for student_id in range(first_id, first_id + args.students):
+        yield {
+            "id": student_id,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "email": f"student{student_id}@example.com",
+            "phone": f"555-{rng.randrange(10_000_000):07d}",
+            "level": rng.choices(levels, cum_weights=level_weights)[0],
+            "enrollment_date": args.start + timedelta(seconds=rng.random() * span),
+            "active": rng.random() < args.active_rate,
+        }
+
+def teachers(args, first_id):
+    rng = random.Random(f"{args.seed}:teachers")
+    for teacher_id in range(first_id, first_id + args.teachers):
+        specialization = rng.choice(SPECIALIZATIONS)
+        yield {
+            "id": teacher_id,
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "email": f"teacher{teacher_id}@example.com",
+            "phone": f"555-{rng.randrange(10_000_000):07d}",
+            "specialization": specialization,
+            "bio": f"Teaches {specialization}.",
+            "active": True,
+        }
+
+def courses(args, first_id, first_teacher_id):
+    """Courses dealt round-robin to the new teachers, each teacher's back to back."""
+    rng = random.Random(f"{args.seed}:courses")
+    levels, level_weights = weights(args.levels)
+    weeks, class_size, price = int_range(args.course_weeks), int_range(args.class_size), int_range(args.price)
+    free_from = [args.start + timedelta(days=rng.randrange(30)) for _ in range(args.teachers)]
+    rows = []
+    for index in range(args.courses):
+        teacher = index % args.teachers
+        level = rng.choices(levels, cum_weights=level_weights)[0]
+        start = free_from[teacher]
+        end = start + timedelta(weeks=rng.randint(*weeks))
+        free_from[teacher] = end + timedelta(days=rng.randrange(15))
+        rows.append({
+            "id": first_id + index,
+            "name": f"{level} {rng.choice(SPECIALIZATIONS)} {first_id + index}",
+            "description": f"{level} course.",
+            "level": level,
+            "max_students": rng.randint(*class_size),
+            "price": float(rng.randint(*price) // 10 * 10),
+            "start_date": start,
+            "end_date": end,
+            "teacher_id": first_teacher_id + teacher,
+            "active": end >= args.today,
+        })
+    return rows
+
+def enrollments(args, first_id, first_student_id, course_rows):
+    """Enrollments spread at random over courses, never beyond a course's max_students."""
+    rng = random.Random(f"{args.seed}:enrollments")
+    statuses, status_weights = weights(args.payment_statuses)
+    # A course cannot take more distinct students than there are
+    places = [min(course["max_students"], args.students) for course in course_rows]
+    taken = set()
+    for enrollment_id in range(first_id, first_id + args.enrollments):
+        index = rng.randrange(len(course_rows))
+        while not places[index]:
+            index = (index + 1) % len(course_rows)
+        places[index] -= 1
+        course = course_rows[index]
+        student_id = first_student_id + rng.randrange(args.students)
+        while (student_id, index) in taken:
+            student_id = first_student_id + rng.randrange(args.students)
+        taken.add((student_id, index))
+        yield {
+            "id": enrollment_id,
+            "student_id": student_id,
+            "course_id": course["id"],
+            "enrollment_date": course["start_date"] - timedelta(days=rng.randrange(60)),
+            "payment_status": rng.choices(statuses, cum_weights=status_weights)[0],
+        }
+
+def write(db, model, rows, batch_size) -> int:
+    """Inserts `rows` in batches and prints the throughput; returns the row count."""
+    started = time.perf_counter()
+    count = 0
+    for batch in batches(rows, batch_size):
+        db.execute(insert(model.__table__), batch)
+        db.commit()
+        count += len(batch)
+        print(f"\r{model.__tablename__:<20} {count:>12,}", end="", flush=True)
+    elapsed = time.perf_counter() - started
+    print(f"\r{model.__tablename__:<20} {count:>12,} rows in {elapsed:7.1f}s  {count / max(elapsed, 1e-9):>10,.0f} rows/s")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--teachers", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=1000)
+    parser.add_argument("--enrollments", type=int, default=20000)
+    parser.add_argument("--levels", default="Beginner=4,Intermediate=4,Advanced=2", help="Weighted levels of students and courses")
+    parser.add_argument("--payment-statuses", default="Paid=8,Pending=1.5,Refunded=0.5", help="Weighted enrollment payment statuses")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(2024, 1, 1), help="First course start and student enrollment date")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=datetime(2026, 12, 31), help="Last student enrollment date")
+    parser.add_argument("--today", type=datetime.fromisoformat, default=datetime(2026, 1, 1), help="Courses ending before this are inactive")
+    parser.add_argument("--active-rate", type=float, default=0.9, help="Share of active students")
+    parser.add_argument("--course-weeks", default="8-16")
+    parser.add_argument("--class-size", default="10-30")
+    parser.add_argument("--price", default="200-900")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--skip-revenue", action="store_true", help="Leave revenue rollups stale (queue revenue.rebuild later)")
+    args = parser.parse_args()
+
+    if args.enrollments and not (args.students and args.courses):
+        parser.error("enrollments need students and courses")
+    if args.courses and not args.teachers:
+        parser.error("courses need teachers")
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        first = {model: next_id(db, model) for model in (models.Student, models.Teacher, models.Course, models.CourseEnrollment)}
+        course_rows = courses(args, first[models.Course], first[models.Teacher])
+        capacity = sum(min(course["max_students"], args.students) for course in course_rows)
+        if args.enrollments > capacity:
+            parser.error(f"the generated courses only have {capacity:,} places; add courses or raise --class-size")
+
+        total = write(db, models.Student, students(args, first[models.Student]), args.batch_size)
+        total += write(db, models.Teacher, teachers(args, first[models.Teacher]), args.batch_size)
+        total += write(db, models.Course, course_rows, args.batch_size)
+        total += write(db, models.CourseEnrollment, enrollments(
+            args, first[models.CourseEnrollment], first[models.Student], course_rows
+        ), args.batch_size)
+
+        if not args.skip_revenue:
+            revenue_started = time.perf_counter()
+            rebuild_revenue(db)
+            print(f"{'revenue_rollups':<20} rebuilt in {time.perf_counter() - revenue_started:7.1f}s")
+
+    elapsed = time.perf_counter() - started
+    print(f"{'total':<20} {total:>12,} rows in {elapsed:7.1f}s  {total / elapsed:>10,.0f} rows/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Saves the database's data under a name and restores it in seconds.
+
+    python scripts/snapshot.py save seeded
+    python scripts/snapshot.py restore seeded
+    python scripts/snapshot.py list
+
+SQLite databases are copied page by page with the backup API into
+snapshots/<name>.db. MySQL tables are copied server-side into a `<database>_snap_<name>`
+schema (CREATE TABLE ... LIKE, INSERT ... SELECT); restoring truncates each table
+and reloads it with one INSERT ... SELECT. Both are far faster than deleting
+rows one by one and reseeding.
+
+The schema is not part of the snapshot: restore into a database migrated to the
+same revision. After a restore every table_versions row is moved past both its
+old and its restored value, so running workers never serve a cached response
+built before the restore.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import select, text, update
+from app import models
+from app.database import Base, engine
+
+SNAPSHOT_DIR = os.path.join(ROOT, "snapshots")
+SNAPSHOT_PREFIX = "_snap_"
+TABLES = [table.name for table in Base.metadata.sorted_tables]
+
+def check_name(name: str) -> str:
+    if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+        raise SystemExit("Snapshot names may only contain letters, digits and underscores")
+    return name
+
+def sqlite_path() -> str:
+    return engine.url.database
+
+def sqlite_snapshot(name: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{name}.db")
+
+def sqlite_copy(source: str, target: str):
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+def mysql_schema(conn, name: str) -> str:
+    return f"{conn.execute(text('SELECT DATABASE()')).scalar()}{SNAPSHOT_PREFIX}{name}"
+
+def save(name: str):
+    if engine.dialect.name == "sqlite":
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        sqlite_copy(sqlite_path(), sqlite_snapshot(name))
+        return
+    with engine.begin() as conn:
+        schema = mysql_schema(conn, name)
+        conn.execute(text(f"DROP DATABASE IF EXISTS `{schema}`"))
+        conn.execute(text(f"CREATE DATABASE `{schema}`"))
+        for table in TABLES:
+            conn.execute(text(f"CREATE TABLE `{schema}`.`{table}` LIKE `{table}`"))
+            conn.execute(text(f"INSERT INTO `{schema}`.`{table}` SELECT * FROM `{table}`"))
+
+def current_versions() -> dict:
+    versions = models.TableVersion.__table__
+    with engine.connect() as conn:
+        return dict(conn.execute(select(versions.c.table_name, versions.c.version)).all())
+
+def restore(name: str):
+    before = current_versions()
+    if engine.dialect.name == "sqlite":
+        if not os.path.exists(sqlite_snapshot(name)):
+            raise SystemExit(f"No snapshot named {name}")
+        engine.dispose()
+        sqlite_copy(sqlite_snapshot(name), sqlite_path())
+    else:
+        with engine.begin() as conn:
+            schema = mysql_schema(conn, name)
+            if not conn.execute(text("SELECT 1 FROM information_schema.SCHEMATA WHERE SCHEMA_NAME = :schema"), {"schema": schema}).first():
+                raise SystemExit(f"No snapshot named {name}")
+            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+            try:
+                for table in TABLES:
+                    conn.execute(text(f"TRUNCATE TABLE `{table}`"))
+                    conn.execute(text(f"INSERT INTO `{table}` SELECT * FROM `{schema}`.`{table}`"))
+            finally:
+                conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+    versions = models.TableVersion.__table__
+    restored = current_versions()
+    with engine.begin() as conn:
+        for table_name, version in restored.items():
+            conn.execute(
+                update(versions)
+                .where(versions.c.table_name == table_name)
+                .values(version=max(version, before.get(table_name, 0)) + 1)
+            )
+
+def snapshots() -> list:
+    if engine.dialect.name == "sqlite":
+        if not os.path.isdir(SNAPSHOT_DIR):
+            return []
+        return sorted(file[:-3] for file in os.listdir(SNAPSHOT_DIR) if file.endswith(".db"))
+    with engine.connect() as conn:
+        prefix = mysql_schema(conn, "")
+        return [
+            schema[len(prefix):] for (schema,) in conn.execute(
+                text("SELECT SCHEMA_NAME FROM information_schema.SCHEMATA WHERE SCHEMA_NAME LIKE :prefix ORDER BY 1"),
+                {"prefix": prefix.replace("_", r"\_") + "%"}
+            )
+        ]
+
+def drop(name: str):
+    if engine.dialect.name == "sqlite":
+        os.remove(sqlite_snapshot(name))
+        return
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS `{mysql_schema(conn, name)}`"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["save", "restore", "list", "drop"])
+    parser.add_argument("name", nargs="?")
+    args = parser.parse_args()
+    if engine.dialect.name not in ("sqlite", "mysql"):
+        raise SystemExit(f"Snapshots support SQLite and MySQL, not {engine.dialect.name}")
+    if args.command == "list":
+        print("\n".join(snapshots()))
+        return
+    if not args.name:
+        parser.error(f"{args.command} needs a snapshot name")
+    started = time.perf_counter()
+    {"save": save, "restore": restore, "drop": drop}[args.command](check_name(args.name))
+    print(f"{args.command} {args.name}: {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
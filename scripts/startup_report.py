@@ -0,0 +1,116 @@
+"""Reports where cold start time goes and fails when it regresses.
+
+    python scripts/startup_report.py --max-import-ms 1500 --max-first-request-ms 3000
+
+Import cost comes from `python -X importtime -c "import main"` in a fresh
+interpreter; time to first request starts a uvicorn process and polls
+/api/health until it answers.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def importtime(code):
+    """Yields (self us, cumulative us, depth, module) for every import made while running `code`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{code} failed:\n{result.stderr[-2000:]}")
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        yield int(self_us), int(cumulative_us), (len(name) - len(name.lstrip())) // 2, name.strip()
+
+def measure_imports(module="main"):
+    """Returns (total ms, [(ms, name)] for direct imports, {package: self ms})."""
+    # Modules the bare interpreter loads at startup (site, .pth files) are not the app's cost
+    baseline = {name for _, _, _, name in importtime("pass")}
+
+    total_ms = 0.0
+    direct = []
+    by_package = defaultdict(float)
+    for self_us, cumulative_us, depth, name in importtime(f"import {module}"):
+        if name in baseline:
+            continue
+        by_package[name.split(".")[0]] += self_us / 1000
+        if name == module:
+            total_ms = cumulative_us / 1000
+        elif depth == 1:
+            direct.append((cumulative_us / 1000, name))
+    return total_ms, sorted(direct, reverse=True), by_package
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_first_request(timeout=30.0):
+    """Milliseconds from spawning a uvicorn process to its first successful response."""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited during startup:\n{server.stderr.read().decode()[-2000:]}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"No response within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+def startup_report(top=15, max_import_ms=None, max_first_request_ms=None, skip_server=False):
+    total_ms, direct, by_package = measure_imports()
+    print(f"import main: {total_ms:.1f} ms\n")
+    print("Slowest imports made by main (cumulative):")
+    for ms, name in direct[:top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    print("\nSelf time by top-level package:")
+    for name, ms in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failures = []
+    if max_import_ms is not None and total_ms > max_import_ms:
+        failures.append(f"import main took {total_ms:.1f} ms (limit {max_import_ms:.0f} ms)")
+
+    if not skip_server:
+        first_request_ms = measure_first_request()
+        print(f"\nTime to first request: {first_request_ms:.1f} ms")
+        if max_first_request_ms is not None and first_request_ms > max_first_request_ms:
+            failures.append(f"first request took {first_request_ms:.1f} ms (limit {max_first_request_ms:.0f} ms)")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return not failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import and cold start cost of the API")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-request-ms", type=float, default=None)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure imports")
+    args = parser.parse_args()
+    try:
+        ok = startup_report(args.top, args.max_import_ms, args.max_first_request_ms, args.skip_server)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    sys.exit(0 if ok else 1)
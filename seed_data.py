@@ -2,15 +2,12 @@ from datetime import datetime, timedelta
 import random
 from faker import Faker
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
-from app.models import Base, Student, Teacher, Course, CourseEnrollment
+from app.database import SessionLocal
+from app.models import Student, Teacher, Course, CourseEnrollment
 
 # Initialize Faker
 fake = Faker()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 def create_seed_data():
     db = SessionLocal()
     try:
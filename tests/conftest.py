@@ -0,0 +1,26 @@
+import os
+
+# Tests get their own database, never the one configured in .env; its schema is recreated on every run
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest
+from app.database import Base, engine
+from app.testing import clear_caches
+
+pytest_plugins = ["app.testing"]
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+@pytest.fixture
+def committed():
+    """For code that commits through its own sessions (jobs, the enrollment queue);
+    empties every table once the test is done."""
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    clear_caches()
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from itertools import count
+from sqlalchemy.orm import Session
+from app import models
+
+_ids = count(1)
+
+def student(db: Session, **fields) -> models.Student:
+    n = next(_ids)
+    row = models.Student(**{
+        "first_name": "Test", "last_name": f"Student{n}", "email": f"student{n}@example.com",
+        "phone": "555-0100", "level": "Beginner", **fields
+    })
+    db.add(row)
+    db.commit()
+    return row
+
+def teacher(db: Session, **fields) -> models.Teacher:
+    n = next(_ids)
+    row = models.Teacher(**{
+        "first_name": "Test", "last_name": f"Teacher{n}", "email": f"teacher{n}@example.com",
+        "phone": "555-0100", "specialization": "General English", **fields
+    })
+    db.add(row)
+    db.commit()
+    return row
+
+def course(db: Session, **fields) -> models.Course:
+    start = fields.pop("start_date", datetime(2026, 1, 1))
+    row = models.Course(**{
+        "name": f"Course {next(_ids)}", "level": "Beginner", "max_students": 10, "price": 300.0,
+        "start_date": start, "end_date": start + timedelta(weeks=8), **fields
+    })
+    db.add(row)
+    db.commit()
+    return row
+
+def enrollment(db: Session, student: models.Student, course: models.Course, payment_status: str = "Paid") -> models.CourseEnrollment:
+    row = models.CourseEnrollment(student_id=student.id, course_id=course.id, payment_status=payment_status)
+    db.add(row)
+    db.commit()
+    return row
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from app import models
+from app.archive import restore_enrollments, restore_students, run_archive
+from app.sync import changes_since, encode_token
+from tests import factories
+
+def ids(db, model):
+    return [row_id for (row_id,) in db.query(model.id).order_by(model.id)]
+
+def test_archived_students_leave_the_hot_tables(db):
+    finished = factories.course(db, start_date=datetime(2020, 1, 1))
+    active_id = factories.student(db).id
+    inactive = factories.student(db, active=False)
+    enrollment_id = factories.enrollment(db, inactive, finished).id
+    inactive_id = inactive.id
+    db.query(models.Student).filter(models.Student.id == inactive_id).update({models.Student.updated_at: datetime(2020, 1, 1)})
+    db.commit()
+
+    assert run_archive(db) == {"students_archived": 1, "enrollments_archived": 1}
+    assert ids(db, models.Student) == [active_id]
+    assert ids(db, models.CourseEnrollment) == []
+    assert ids(db, models.ArchivedStudent) == [inactive_id]
+    assert ids(db, models.ArchivedEnrollment) == [enrollment_id]
+
+    # A second run finds nothing left to move instead of colliding with the archived copies
+    assert run_archive(db) == {"students_archived": 0, "enrollments_archived": 0}
+
+def test_enrollments_of_finished_courses_are_archived(db):
+    finished = factories.course(db, start_date=datetime(2020, 1, 1))
+    current = factories.course(db)
+    student = factories.student(db)
+    old_id = factories.enrollment(db, student, finished).id
+    recent_id = factories.enrollment(db, student, current).id
+
+    assert run_archive(db) == {"students_archived": 0, "enrollments_archived": 1}
+    assert ids(db, models.CourseEnrollment) == [recent_id]
+    assert ids(db, models.ArchivedEnrollment) == [old_id]
+
+def archive_inactive_student(db):
+    """Archives one inactive student with an enrollment in a finished course; returns their ids."""
+    finished = factories.course(db, start_date=datetime(2020, 1, 1))
+    student = factories.student(db, active=False)
+    student_id, enrollment_id = student.id, factories.enrollment(db, student, finished).id
+    db.query(models.Student).filter(models.Student.id == student_id).update({models.Student.updated_at: datetime(2020, 1, 1)})
+    db.commit()
+    run_archive(db)
+    return student_id, enrollment_id
+
+def test_restore_leaves_students_whose_id_was_reused_archived(db):
+    student_id, enrollment_id = archive_inactive_student(db)
+    # Ids handed out again, as SQLite and MySQL before 8.0 do after the highest row moves away
+    factories.student(db, id=student_id)
+    factories.enrollment(db, factories.student(db), factories.course(db))
+    db.query(models.CourseEnrollment).update({models.CourseEnrollment.id: enrollment_id})
+    db.commit()
+
+    result = restore_students(db, [student_id])
+    assert result["restored"] == 0 and result["id_conflicts"] == [student_id]
+    assert ids(db, models.ArchivedStudent) == [student_id]
+    assert ids(db, models.ArchivedEnrollment) == [enrollment_id]
+
+    result = restore_enrollments(db, [enrollment_id])
+    assert result["restored"] == 0 and result["id_conflicts"] == [enrollment_id]
+    assert ids(db, models.ArchivedEnrollment) == [enrollment_id]
+
+def test_restored_students_are_not_reported_deleted_to_delta_sync(db):
+    token = encode_token(datetime.utcnow() - timedelta(seconds=1))
+    student_id, enrollment_id = archive_inactive_student(db)
+    assert changes_since(db, models.Student, token)["deleted"] == [student_id]
+
+    assert restore_students(db, [student_id])["restored"] == 1
+    students = changes_since(db, models.Student, token)
+    assert [student.id for student in students["changed"]] == [student_id] and students["deleted"] == []
+    assert changes_since(db, models.CourseEnrollment, token)["deleted"] == []
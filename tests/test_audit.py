@@ -0,0 +1,44 @@
+import pytest
+from app.audit import audit_log
+from app.database import SessionLocal
+from app.jobs import JobCancelled
+from app.routes.students import bulk_delete_students_job
+from tests import factories
+
+def recorded():
+    """Takes the events queued for the audit writer, which tests do not start."""
+    events = []
+    while not audit_log.queue.empty():
+        event = audit_log.queue.get_nowait()
+        events.append((event["action"], event["entity"], event["entity_id"]))
+    return events
+
+def test_bulk_routes_audit_only_existing_rows(client, db):
+    recorded()
+    student_id = factories.student(db).id
+
+    client.put("/api/students/bulk-deactivate", json=[student_id, 999999])
+    assert recorded() == [("deactivate", "students", student_id)]
+
+    response = client.request("DELETE", "/api/students/bulk-delete", json=[999999, student_id])
+    assert response.json()["deleted"] == 1
+    assert recorded() == [("delete", "students", student_id)]
+
+def test_bulk_delete_of_unknown_ids_audits_nothing(client, db):
+    recorded()
+    client.request("DELETE", "/api/courses/bulk-delete", json=[999998, 999999])
+    assert recorded() == []
+
+class CancelAfterFirstChunk:
+    job_id = 1
+
+    def progress(self, processed, total=None):
+        raise JobCancelled()
+
+def test_cancelled_bulk_delete_job_audits_the_committed_chunks(committed):
+    recorded()
+    with SessionLocal() as db:
+        student_ids = [factories.student(db).id for _ in range(3)]
+    with pytest.raises(JobCancelled):
+        bulk_delete_students_job(CancelAfterFirstChunk(), {"student_ids": student_ids + [999999], "chunk_size": 2})
+    assert recorded() == [("delete", "students", student_ids[0]), ("delete", "students", student_ids[1])]
@@ -0,0 +1,21 @@
+from tests import factories
+
+def test_student_list_reflects_bulk_writes(client, db):
+    student_id = factories.student(db).id
+    assert client.get("/api/students/").headers["X-Cache"] == "MISS"
+    assert client.get("/api/students/").headers["X-Cache"] == "HIT"
+
+    client.put("/api/students/bulk-deactivate", json=[student_id])
+    response = client.get("/api/students/")
+    assert response.headers["X-Cache"] == "MISS"
+    assert [row["active"] for row in response.json()] == [False]
+
+    client.request("DELETE", "/api/students/bulk-delete", json=[student_id])
+    response = client.get("/api/students/")
+    assert response.json() == []
+    assert response.headers["X-Total-Count"] == "0"
+
+def test_rolled_back_rows_are_not_served_from_cache(client, db):
+    # Runs after the test above, whose writes were rolled back to the same table versions
+    student = factories.student(db, email="only@example.com")
+    assert [row["email"] for row in client.get("/api/students/").json()] == [student.email]
@@ -0,0 +1,53 @@
+import pytest
+from app import models, schemas
+from app.database import SessionLocal
+from app.enrollment_queue import commit_batch
+from tests import factories
+
+@pytest.fixture
+def session(committed):
+    # commit_batch opens its own session, so the rows it reads must really be committed
+    with SessionLocal(expire_on_commit=False) as db:
+        yield db
+
+def request(student, course):
+    return schemas.EnrollmentCreate(student_id=student.id, course_id=course.id, payment_status="Paid")
+
+def test_repeat_request_returns_the_existing_enrollment(session):
+    course = factories.course(session, max_students=1)
+    student = factories.student(session)
+    [enrolled] = commit_batch(course.id, [request(student, course)])
+    assert isinstance(enrolled, schemas.Enrollment)
+
+    assert commit_batch(course.id, [request(student, course)]) == [enrolled]
+
+def test_repeat_request_returns_the_existing_waitlist_entry(session):
+    course = factories.course(session, max_students=1)
+    first, second = factories.student(session), factories.student(session)
+    commit_batch(course.id, [request(first, course)])
+    [waiting] = commit_batch(course.id, [request(second, course)])
+    assert isinstance(waiting, schemas.WaitlistEntry) and waiting.position == 1
+
+    assert commit_batch(course.id, [request(second, course)]) == [waiting]
+
+def test_repeats_within_one_batch_share_a_row(session):
+    course = factories.course(session, max_students=1)
+    first, second = factories.student(session), factories.student(session)
+    results = commit_batch(course.id, [request(first, course), request(second, course), request(first, course), request(second, course)])
+    assert isinstance(results[0], schemas.Enrollment) and results[2] == results[0]
+    assert isinstance(results[1], schemas.WaitlistEntry) and results[3] == results[1]
+    assert results[1].position == 1
+
+def test_student_promoted_in_the_batch_is_not_waitlisted_again(session):
+    course = factories.course(session, max_students=1)
+    first, second = factories.student(session), factories.student(session)
+    commit_batch(course.id, [request(first, course)])
+    commit_batch(course.id, [request(second, course)])
+    session.query(models.CourseEnrollment).filter(models.CourseEnrollment.student_id == first.id).delete()
+    session.commit()
+
+    # The freed place goes to the waitlisted student first, then their repeat request finds that enrollment
+    [result] = commit_batch(course.id, [request(second, course)])
+    assert isinstance(result, schemas.Enrollment) and result.student_id == second.id
+    assert session.query(models.WaitlistEntry).count() == 0
+    assert session.query(models.CourseEnrollment).filter(models.CourseEnrollment.student_id == second.id).count() == 1
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from app import jobs
+from app.database import SessionLocal
+from app.models import Job
+
+def test_invalid_params_are_rejected_when_queued(client):
+    response = client.post("/api/jobs/", json={"job_type": "students.bulk_delete", "params": {}})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "params", "student_ids"]
+
+    response = client.post("/api/jobs/", json={"job_type": "archive.run", "params": {"chunk_size": 0}})
+    assert response.status_code == 422
+
+def test_jobs_left_running_by_a_dead_worker_are_failed(committed):
+    stale = datetime.utcnow() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+    with SessionLocal() as db:
+        orphan = Job(job_type="archive.run", status="running", started_at=stale, heartbeat_at=stale)
+        alive = Job(job_type="archive.run", status="running", started_at=stale, heartbeat_at=datetime.utcnow())
+        db.add_all([orphan, alive])
+        db.commit()
+        orphan_id, alive_id = orphan.id, alive.id
+
+    assert jobs.runner.fail_stale() == 1
+    with SessionLocal() as db:
+        assert db.get(Job, orphan_id).status == "failed"
+        assert db.get(Job, orphan_id).finished_at is not None
+        assert db.get(Job, alive_id).status == "running"
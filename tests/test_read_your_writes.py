@@ -0,0 +1,26 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import database
+from app.database import LAST_WRITE_COOKIE, ReadYourWritesMiddleware, ReplicaRouter, read_only
+
+app = FastAPI()
+app.add_middleware(ReadYourWritesMiddleware)
+
+@app.post("/write")
+def write():
+    return {}
+
+@app.post("/query")
+@read_only
+def query():
+    return {}
+
+def test_only_writing_routes_pin_the_client_to_the_primary(monkeypatch):
+    monkeypatch.setattr(database, "replicas", ReplicaRouter([]))
+    client = TestClient(app)
+
+    assert LAST_WRITE_COOKIE not in client.post("/query").cookies
+    assert not database.replicas._recent_writes
+
+    assert LAST_WRITE_COOKIE in client.post("/write").cookies
+    assert database.replicas._recent_writes
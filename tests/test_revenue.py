@@ -0,0 +1,24 @@
+from app.revenue import refresh_course_revenue
+from tests import factories
+
+REVENUE_BY_TEACHER = "/api/reports/revenue?from=2026-01-01&to=2026-12-31&group_by=teacher"
+
+def test_deleted_teachers_revenue_is_reported_without_a_teacher(client, db):
+    teacher_id = factories.teacher(db).id
+    course = factories.course(db, teacher_id=teacher_id)
+    factories.enrollment(db, factories.student(db), course)
+    refresh_course_revenue(db, [course.id])
+    db.commit()
+    assert [row["key"] for row in client.get(REVENUE_BY_TEACHER).json()] == [teacher_id]
+
+    client.delete(f"/api/teachers/{teacher_id}")
+    assert [row["key"] for row in client.get(REVENUE_BY_TEACHER).json()] == [None]
+
+def test_projections_reject_long_windows_and_negative_values(client):
+    def project(start, end, **scenario):
+        return client.post("/api/reports/revenue/projections", json={"from": start, "to": end, "scenarios": [scenario]})
+
+    assert project("2026-01-01", "2035-12-31").status_code == 200
+    assert project("2026-01-01", "2036-01-01").status_code == 422
+    assert project("2026-01-01", "2026-12-31", level_multipliers={"B1": -1}).status_code == 422
+    assert project("2026-01-01", "2026-12-31", course_enrollments={"1": -5}).status_code == 422